@@ -0,0 +1,94 @@
+import os
+import numpy as np
+
+BOOTSTRAP_SAMPLES = int(os.environ.get("BOOTSTRAP_SAMPLES", "10000"))
+MAX_BOOTSTRAP_SAMPLES = int(os.environ.get("MAX_BOOTSTRAP_SAMPLES", "100000"))
+BOOTSTRAP_CONFIDENCE = 0.95
+
+# cumulative loss (same units as totalProfit) that counts as ruin
+BOOTSTRAP_RUIN_LEVEL = float(os.environ.get("BOOTSTRAP_RUIN_LEVEL", "10000"))
+
+# resampled days held in memory at once, larger requests run in chunks of paths
+BOOTSTRAP_CHUNK_CELLS = 4_000_000
+
+'''
+mean and two sided confidence interval of resampled values
+'''
+def interval(samples, confidence):
+    low, high = np.quantile(samples, [(1 - confidence) / 2, (1 + confidence) / 2])
+    return {"mean": round(float(np.mean(samples)), 2), "low": round(float(low), 2), "high": round(float(high), 2)}
+
+'''
+bootstrap of a backtest: daily p&l paths resampled with replacement as one 2-d array of days,
+giving total profit, max drawdown (from the running peak, like TradeStats) and the chance of ruin,
+win rate resamples the trades, the count of wins in a resample is binomial so no trade matrix is built
+'''
+def bootstrap(daily_pnl, trade_wins, samples=BOOTSTRAP_SAMPLES, confidence=BOOTSTRAP_CONFIDENCE, ruin_level=BOOTSTRAP_RUIN_LEVEL, seed=0):
+    samples = int(samples)
+    if not 0 < samples <= MAX_BOOTSTRAP_SAMPLES:
+        raise ValueError(f"bootstrap samples must be between 1 and {MAX_BOOTSTRAP_SAMPLES}")
+    if not 0 < confidence < 1:
+        raise ValueError("bootstrap confidence must be between 0 and 1")
+
+    rng = np.random.default_rng(seed)
+    daily_pnl = np.asarray(daily_pnl, dtype=np.float64)
+    num_days = len(daily_pnl)
+
+    totals = np.zeros(samples)
+    drawdowns = np.zeros(samples)
+    ruined = np.zeros(samples, dtype=bool)
+    if num_days > 0:
+        chunk = max(BOOTSTRAP_CHUNK_CELLS // num_days, 1)
+        for start in range(0, samples, chunk):
+            stop = min(start + chunk, samples)
+
+            # path x day matrix of resampled days, equity after each day
+            equity = np.cumsum(daily_pnl[rng.integers(0, num_days, (stop - start, num_days))], axis=1)
+            totals[start:stop] = equity[:, -1]
+            drawdowns[start:stop] = np.minimum((equity - np.maximum.accumulate(np.maximum(equity, 0.0), axis=1)).min(axis=1), 0.0)
+            ruined[start:stop] = equity.min(axis=1) <= -ruin_level
+
+    num_trades = len(trade_wins)
+    if num_trades > 0:
+        win_rates = rng.binomial(num_trades, np.mean(trade_wins), samples) / num_trades * 100
+    else:
+        win_rates = np.zeros(samples)
+
+    return {
+        "samples": samples,
+        "confidence": confidence,
+        "totalProfit": interval(totals, confidence),
+        "maxDrawdown": interval(drawdowns, confidence),
+        "winRate": interval(win_rates, confidence),
+        "ruinLevel": ruin_level,
+        "probabilityOfRuin": round(float(ruined.mean()), 4)
+    }
+
+'''
+rolling walk forward windows over num_days sorted days, as (in sample start, out of sample start, out of sample stop)
+out of sample windows follow each other without overlap, the last one may be shorter
+'''
+def walk_forward_windows(num_days, in_sample, out_of_sample):
+    in_sample, out_of_sample = int(in_sample), int(out_of_sample)
+    if in_sample < 1 or out_of_sample < 1:
+        raise ValueError("walk forward windows need at least one day in and out of sample")
+    if num_days <= in_sample:
+        raise ValueError(f"walk forward needs more than {in_sample} days, {num_days} selected")
+
+    starts = np.arange(0, num_days - in_sample, out_of_sample)
+    return [(int(start), int(start) + in_sample, min(int(start) + in_sample + out_of_sample, num_days)) for start in starts]
+
+'''
+best grid row of every in sample window from a grid x day p&l matrix, one prefix sum serves every window
+ties go to the earlier grid row
+'''
+def walk_forward_select(day_pnl, windows):
+    day_pnl = np.asarray(day_pnl, dtype=np.float64)
+    running = np.concatenate((np.zeros((len(day_pnl), 1)), np.cumsum(day_pnl, axis=1)), axis=1)
+    starts = np.array([start for start, _, _ in windows])
+    stops = np.array([stop for _, stop, _ in windows])
+
+    # grid x window in sample profit
+    scores = running[:, stops] - running[:, starts]
+    best = np.argmax(scores, axis=0)
+    return best, scores[best, np.arange(len(windows))]
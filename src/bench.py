@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import numpy as np
+from . import main
+from .chain import ChainCache, DayChain, list_dates, minute_grid
+
+BENCH_BASELINE = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+BENCH_THRESHOLD = 0.25
+
+# representative requests: early / midday / late entries, narrow and wide wings
+BENCH_CASES = [
+    (93000000, 10, 1.0, 2, 3.0, 2.5, 1.5),
+    (90000000, 30, 1.3, 3, 1.2, 1.0, 2.0),
+    (113000000, 25, 1.0, 8, 1.5, 1.0, 1.5),
+    (140000000, 50, 2.0, 3, 2.2, 1.8, 1.2),
+]
+
+'''
+runs fn repeat times, seconds of the fastest and the median run
+'''
+def measure(fn, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return {"min": round(min(seconds), 6), "median": round(float(np.median(seconds)), 6), "repeat": repeat}
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__
+    }
+
+'''
+points the backtest at the data directory with every cache off, so each run does the full work
+'''
+def setup(data_path):
+    main.BASE_PATH = data_path
+    main.chain_cache = ChainCache(data_path)
+    main.DAY_MEMO = False
+    main.RESULT_CACHE = False
+    return list_dates(data_path)
+
+'''
+cold decode of every day archive: zip member reads and gzip inflate
+'''
+def bench_load(data_path, dates, repeat):
+    def run():
+        for date in dates:
+            chain = DayChain(f'{data_path}{date}.zip', date)
+            for name in chain.names():
+                chain.read(name)
+    return measure(run, repeat)
+
+'''
+single mid lookups through the shared chain cache, every listed strike on a 30 minute grid
+'''
+def bench_mid_price(dates, repeat):
+    timestamps = [int(t) for t in minute_grid()[::30]]
+    lookups = []
+    for date in dates:
+        chain = main.chain_cache.day(date)
+        chain.preload()
+        for call_or_put in ('call', 'put'):
+            lookups += [(date, int(strike), t, call_or_put) for strike in chain.strikes(call_or_put) for t in timestamps]
+
+    def run():
+        for date, strike, t, call_or_put in lookups:
+            main.get_mid_price(date, strike, t, call_or_put)
+    return measure(run, repeat)
+
+'''
+strike scanning of both wings for every case and day
+'''
+def bench_scan(dates, repeat):
+    def run():
+        for monitor_time, spread_width, monitor_credit, num_spreads, *_ in BENCH_CASES:
+            for date in dates:
+                atm_strike = main.chain_cache.day(date).atm_strike(monitor_time)
+                if atm_strike is None:
+                    continue
+                main.find_bearish_call_spreads(date, monitor_time, monitor_credit, spread_width, num_spreads, atm_strike + main.BUFFER)
+                main.find_bullish_put_spreads(date, monitor_time, monitor_credit, spread_width, num_spreads, atm_strike - main.BUFFER)
+    return measure(run, repeat)
+
+'''
+entry and stop loss merges of the selected spreads, spread series rebuilt every run
+'''
+def bench_merge(dates, repeat):
+    orders = []
+    for monitor_time, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult in BENCH_CASES:
+        for date in dates:
+            atm_strike = main.chain_cache.day(date).atm_strike(monitor_time)
+            if atm_strike is None:
+                continue
+            spreads = main.find_bearish_call_spreads(date, monitor_time, monitor_credit, spread_width, num_spreads, atm_strike + main.BUFFER)
+            spreads += main.find_bullish_put_spreads(date, monitor_time, monitor_credit, spread_width, num_spreads, atm_strike - main.BUFFER)
+            orders += [(date, spread, monitor_time, stop_price, limit_price, sl_mult) for spread in spreads]
+
+    def run():
+        for date in dates:
+            main.chain_cache.day(date).spreads.clear()
+        for date, spread, monitor_time, stop_price, limit_price, sl_mult in orders:
+            entry_time, entry_credit = main.stop_limit_order(date, spread.short_strike, spread.long_strike, monitor_time, stop_price, limit_price, spread.call_or_put)
+            if entry_time is not None:
+                main.stop_loss(date, spread.short_strike, spread.long_strike, entry_time, entry_credit, sl_mult, spread.call_or_put)
+    return measure(run, repeat)
+
+'''
+full backtest of every case over all days, chains warm, single process
+'''
+def bench_end_to_end(dates, repeat):
+    def run():
+        for date in dates:
+            main.chain_cache.day(date).spreads.clear()
+        for case in BENCH_CASES:
+            main.pw_veic(*case, workers=1)
+    return measure(run, repeat)
+
+def run_benchmarks(data_path, repeat):
+    dates = setup(data_path)
+    print(f"benchmarking {len(dates)} days, {len(BENCH_CASES)} cases, {repeat} runs each")
+
+    results = {}
+    results["load"] = bench_load(data_path, dates, repeat)
+    results["mid_price"] = bench_mid_price(dates, repeat)
+    results["scan"] = bench_scan(dates, repeat)
+    results["merge"] = bench_merge(dates, repeat)
+    results["end_to_end"] = bench_end_to_end(dates, repeat)
+    for name, result in results.items():
+        print(f"{name}: min {result['min'] * 1000:.2f}ms, median {result['median'] * 1000:.2f}ms")
+
+    return {"machine": machine_info(), "days": len(dates), "cases": BENCH_CASES, "results": results}
+
+'''
+benchmarks slower than baseline by more than the threshold, compared on the fastest run
+'''
+def compare(report, baseline, threshold):
+    regressions = []
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            continue
+        base = baseline["results"][name]["min"]
+        change = result["min"] / base - 1 if base > 0 else 0.0
+        print(f"{name}: {change * 100:+.1f}% vs baseline")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+'''
+usage: python -m src.bench [--data src/data/] [--repeat 5] [--out report.json]
+                           [--baseline file] [--save-baseline] [--threshold 0.25]
+exits non-zero when a benchmark regresses past the threshold
+'''
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="src/data/")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out")
+    parser.add_argument("--baseline", default=BENCH_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=BENCH_THRESHOLD)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.data, args.repeat)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline["machine"] != report["machine"]:
+            print("baseline was recorded on a different machine, compare with care")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"regressed past {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
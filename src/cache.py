@@ -0,0 +1,222 @@
+import os
+import io
+import json
+import hashlib
+import threading
+import numpy as np
+
+RESULT_CACHE_PATH = os.environ.get("RESULT_CACHE_PATH", "/tmp/pw_veic_cache/")
+RESULT_CACHE_MAX_MB = float(os.environ.get("RESULT_CACHE_MAX_MB", "256"))
+DAY_MEMO_PATH = os.environ.get("DAY_MEMO_PATH", os.path.join(RESULT_CACHE_PATH, "days/"))
+DAY_MEMO_MAX_MB = float(os.environ.get("DAY_MEMO_MAX_MB", "256"))
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", "300"))
+
+# eviction trims down to this share of the limit, so a full cache is not rescanned on every write
+EVICT_TARGET = 0.8
+
+'''
+canonical form of request parameters, equal requests give equal values
+'''
+def normalize_params(value):
+    if isinstance(value, dict):
+        return {key: normalize_params(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [normalize_params(item) for item in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+'''
+names, sizes and mtimes of the day files, changes whenever the data does
+'''
+def dataset_fingerprint(base_path):
+    entries = []
+    for entry in os.scandir(base_path):
+        if entry.is_file():
+            stat = entry.stat()
+            entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    entries.sort()
+    return hashlib.sha256(json.dumps(entries).encode()).hexdigest()
+
+'''
+fingerprint of each day's files, so changing one day only invalidates that day
+'''
+def day_fingerprints(base_path):
+    entries = {}
+    for entry in os.scandir(base_path):
+        if entry.is_file():
+            stat = entry.stat()
+            date = entry.name.split(".")[0]
+            entries.setdefault(date, []).append((entry.name, stat.st_size, stat.st_mtime_ns))
+    return {date: hashlib.sha256(json.dumps(sorted(files)).encode()).hexdigest() for date, files in entries.items()}
+
+'''
+content addressed entries on local disk with size based eviction
+'''
+class DiskCache:
+    extension = ""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        # estimated bytes on disk, from the last scan plus our own writes since
+        self.total_bytes = None
+
+    def key(self, params, fingerprint):
+        payload = json.dumps({"params": normalize_params(params), "data": fingerprint}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        file_path = os.path.join(self.path, f"{key}{self.extension}")
+        try:
+            with open(file_path, 'rb') as f:
+                result = self.decode(f.read())
+        # missing or half written entries count as a miss
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # touch so eviction drops least recently used first, evicted meanwhile or a read only cache still hits
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            file_path = os.path.join(self.path, f"{key}{self.extension}")
+            temp_path = f"{file_path}.{os.getpid()}.tmp"
+            encoded = self.encode(result)
+            with open(temp_path, 'wb') as f:
+                f.write(encoded)
+            os.replace(temp_path, file_path)
+
+            # only scan the directory once the estimate passes the limit
+            if self.total_bytes is None:
+                self.evict()
+            else:
+                self.total_bytes += len(encoded)
+                if self.total_bytes > self.max_bytes:
+                    self.evict()
+        # a read only or full disk only costs the cache
+        except OSError as e:
+            print(f"cache write failed: {str(e)}")
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(self.extension):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        # oldest first until well under the size limit
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes > self.max_bytes:
+            for _, size, file_path in sorted(entries):
+                if total_bytes <= self.max_bytes * EVICT_TARGET:
+                    break
+                try:
+                    os.remove(file_path)
+                    total_bytes -= size
+                except OSError:
+                    pass
+        self.total_bytes = total_bytes
+
+    def stats(self, hit):
+        return {"hit": hit, "hits": self.hits, "misses": self.misses}
+
+'''
+finished response bodies as json
+'''
+class ResultCache(DiskCache):
+    extension = ".json"
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024):
+        super().__init__(path, max_bytes)
+
+    def encode(self, result):
+        return json.dumps(result, separators=(',', ':')).encode()
+
+    def decode(self, raw):
+        return json.loads(raw)
+
+'''
+per (day, parameter set) trade rows as numpy arrays, exact values round trip
+'''
+class DayMemo(DiskCache):
+    extension = ".npy"
+
+    def __init__(self, path=DAY_MEMO_PATH, max_bytes=DAY_MEMO_MAX_MB * 1024 * 1024):
+        super().__init__(path, max_bytes)
+
+    def encode(self, trades):
+        buffer = io.BytesIO()
+        np.save(buffer, trades, allow_pickle=False)
+        return buffer.getvalue()
+
+    def decode(self, raw):
+        return np.load(io.BytesIO(raw), allow_pickle=False)
+
+'''
+one in-flight computation per key, shared by every caller that arrives while it runs
+'''
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+'''
+concurrent calls with the same key run fn once, followers wait for the leader's result
+and get its error if it fails, a finished flight is forgotten so later calls run again
+'''
+class SingleFlight:
+    def __init__(self, timeout=SINGLE_FLIGHT_TIMEOUT):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.shared = 0
+
+    '''
+    returns fn's result and whether it came from another caller's flight
+    '''
+    def do(self, key, fn):
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+            else:
+                self.shared += 1
+
+        if not leader:
+            if not flight.done.wait(self.timeout):
+                raise TimeoutError(f"identical request still running after {self.timeout:g}s")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result, False
@@ -0,0 +1,499 @@
+import os
+import gzip
+import hashlib
+import io
+import json
+import struct
+import time
+import zipfile
+import numpy as np
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from collections import OrderedDict
+from .engine import build_spread_series
+from .timing import timings
+
+CHAIN_DTYPE = np.dtype([('time', 'i4'), ('mid', 'f4')])
+MAX_CACHED_DAYS = int(os.environ.get("CHAIN_CACHE_DAYS", "32"))
+
+# columnar store: magic, header length, json header, then time and mid columns
+COLUMNAR_MAGIC = b"PWCHAIN1"
+COLUMNAR_EXTENSION = ".chain"
+
+# per-day metadata sidecar next to the day file
+METADATA_EXTENSION = ".meta.json"
+SESSION_OPEN_MINUTE = 9 * 60 + 30
+SESSION_CLOSE_MINUTE = 16 * 60
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+'''
+one day of option data, the archive is read once and each strike decoded once
+'''
+class DayChain:
+    def __init__(self, path, date):
+        self.date = date
+        self.meta_path = os.path.splitext(path)[0] + METADATA_EXTENSION
+        self.meta = None
+
+        # read archive and central directory once
+        with timings.span("chain_open"), open(path, 'rb') as f:
+            raw = f.read()
+            self.zf = zipfile.ZipFile(io.BytesIO(raw), 'r')
+
+        # archives ship with the code and checkouts reset mtimes, so they are known by content
+        self.source = {"size": len(raw), "sha256": hashlib.sha256(raw).hexdigest()}
+        timings.count("files_opened")
+        timings.count("bytes_read", len(raw))
+        self.series = {}
+        self.spreads = {}
+
+        # series name -> member location in the archive
+        self.index = {info.filename.split('/')[-1]: info for info in self.zf.infolist() if not info.is_dir()}
+        self.strike_index = {}
+
+    def names(self):
+        return list(self.index)
+
+    '''
+    sorted strikes listed for calls or puts
+    '''
+    def strikes(self, call_or_put):
+        if call_or_put not in self.strike_index:
+            prefix = 'C' if call_or_put == 'call' else 'P'
+            self.strike_index[call_or_put] = np.array(sorted(int(name[1:]) for name in self.index if name[0] == prefix), dtype=int)
+        return self.strike_index[call_or_put]
+
+    '''
+    byte offset and compressed size of a series in the archive
+    '''
+    def location(self, name):
+        info = self.index.get(name)
+        if info is None:
+            return None
+        return info.header_offset, info.compress_size
+
+    def read(self, name):
+        info = self.index.get(name)
+        # if file not found
+        if info is None:
+            return None
+        # archive dropped after a full decode
+        if self.zf is None:
+            return self.series[name]
+        with timings.span("decompress"):
+            raw = gzip.decompress(self.zf.read(info))
+        timings.count("bytes_inflated", len(raw))
+        return np.frombuffer(raw, dtype=CHAIN_DTYPE)
+
+    def load(self, strike, call_or_put):
+        name = f"{'C' if call_or_put == 'call' else 'P'}{strike}"
+
+        # decode on first use
+        data = self.series.get(name)
+        if data is None:
+            data = self.read(name)
+            if data is None:
+                return None
+            data = in_time_order(data, f"{self.date} {name}")
+            self.series[name] = data
+        return data
+
+    '''
+    combined short - long series for a strike pair, built once per day
+    '''
+    def spread(self, short_strike, long_strike, call_or_put):
+        key = (short_strike, long_strike, call_or_put)
+        if key not in self.spreads:
+            short_data = self.load(short_strike, call_or_put)
+            long_data = self.load(long_strike, call_or_put)
+            self.spreads[key] = build_spread_series(short_data['time'], short_data['mid'], long_data['time'], long_data['mid'])
+        return self.spreads[key]
+
+    '''
+    decodes every series of the day, returns bytes held in memory
+    the archive is only needed to decode, so it is dropped once every series is
+    '''
+    def preload(self):
+        for name in self.names():
+            strike = name[1:]
+            self.load(strike, 'call' if name[0] == 'C' else 'put')
+        self.metadata()
+        self.zf = None
+        return self.nbytes()
+
+    def nbytes(self):
+        return sum(data['time'].nbytes + data['mid'].nbytes for data in self.series.values())
+
+    '''
+    per-day metadata from the sidecar, computed and saved on first use if missing
+    or if it was computed from another version of the day file
+    '''
+    def metadata(self):
+        if self.meta is None:
+            self.meta = read_metadata(self.meta_path)
+            if self.meta is None or self.meta.get("source") != self.source:
+                self.meta = compute_metadata(self)
+                try:
+                    write_metadata(self.meta_path, self.meta)
+                # read only deployments keep it in memory
+                except OSError:
+                    pass
+        return self.meta
+
+    '''
+    at the money strike at the timestamp, none if the day has no quotes
+    '''
+    def atm_strike(self, timestamp):
+        atm = self.metadata()["atm"]
+        if len(atm["times"]) == 0:
+            return None
+        index = min(bisect_left(atm["times"], timestamp), len(atm["times"]) - 1)
+        return atm["strikes"][index]
+
+    '''
+    mids of many strikes at many timestamps, nan where there is no tick
+    '''
+    def mids_at(self, strikes, timestamps, call_or_put):
+        timestamps = np.asarray(timestamps)
+        out = np.full((len(strikes), len(timestamps)), np.nan, dtype=np.float32)
+        for row, strike in enumerate(strikes):
+            data = self.load(int(strike), call_or_put)
+            if data is not None:
+                out[row] = lookup_mids(data['time'], data['mid'], timestamps)
+        return out
+
+'''
+one day of the columnar store, columns are memory mapped and series are views
+resolution picks a stored pyramid level (min gap between ticks), none is the default level
+'''
+class ColumnarDayChain(DayChain):
+    def __init__(self, path, date, resolution=None):
+        self.date = date
+        self.meta_path = os.path.splitext(path)[0] + METADATA_EXTENSION
+        self.meta = None
+        self.series = {}
+        self.spreads = {}
+
+        # header index of series name -> start, length
+        with timings.span("chain_open"):
+            stat = os.stat(path)
+            header = read_columnar_header(path)
+            self.buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        timings.count("files_opened")
+        self.index = header["series"]
+        self.strike_index = {}
+        
+        # generated by ingest next to its sidecar, size and mtime identify it
+        self.source = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        
+        if resolution is not None and resolution != header.get("resolution"):
+            levels = header.get("levels", {})
+            if str(resolution) not in levels:
+                stored = sorted([int(level) for level in levels] + ([header["resolution"]] if "resolution" in header else []))
+                raise ValueError(f"{date} has no resolution {resolution}, stored: {stored}")
+            self.index = levels[str(resolution)]
+        self.time_offset = header["timeOffset"]
+        self.times = self.buffer[header["timeOffset"]:header["timeOffset"] + 4 * header["count"]].view('<i4')
+        self.mids = self.buffer[header["midOffset"]:header["midOffset"] + 4 * header["count"]].view('<f4')
+
+    def location(self, name):
+        location = self.index.get(name)
+        if location is None:
+            return None
+        start, length = location
+        return self.time_offset + 4 * start, 4 * length
+
+    def read(self, name):
+        location = self.index.get(name)
+        if location is None:
+            return None
+        start, length = location
+        return {'time': self.times[start:start + length], 'mid': self.mids[start:start + length]}
+
+'''
+reads the json header of a columnar day file
+'''
+def read_columnar_header(path):
+    with open(path, 'rb') as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar chain file")
+        header_length, = struct.unpack('<Q', f.read(8))
+        return json.loads(f.read(header_length))
+
+'''
+writes series (name -> times, mids) as one contiguous time column and one mid column
+levels (resolution -> series) are appended as extra pyramid levels, a level series with
+the same ticks as the default one shares its place in the columns
+'''
+def write_columnar(path, date, series, metadata=None, resolution=None, levels=None):
+    names = sorted(series)
+    lengths = [len(series[name][0]) for name in names]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(int) if names else []
+    count = int(sum(lengths))
+    columns = [series[name] for name in names]
+    default_starts = dict(zip(names, starts))
+    
+    level_index = {}
+    for level, level_series in sorted((levels or {}).items()):
+        level_index[str(level)] = {}
+        for name in sorted(level_series):
+            times, mids = level_series[name]
+            if name in series and np.array_equal(times, series[name][0]) and np.array_equal(mids, series[name][1], equal_nan=True):
+                level_index[str(level)][name] = [int(default_starts[name]), len(times)]
+            else:
+                level_index[str(level)][name] = [count, len(times)]
+                columns.append((times, mids))
+                count += len(times)
+
+    def align(offset):
+        return (offset + 7) // 8 * 8
+
+    # header offsets depend on header length, so size it with placeholders first
+    header = {"date": date, "count": count, "timeOffset": 0, "midOffset": 0, "series": {name: [int(start), int(length)] for name, start, length in zip(names, starts, lengths)}}
+    if resolution is not None:
+        header["resolution"] = resolution
+    if level_index:
+        header["levels"] = level_index
+    if metadata:
+        header.update(metadata)
+    prefix_length = len(COLUMNAR_MAGIC) + 8 + len(json.dumps(header)) + 64
+    header["timeOffset"] = align(prefix_length)
+    header["midOffset"] = align(header["timeOffset"] + 4 * count)
+    encoded = json.dumps(header).encode()
+
+    times = np.concatenate([np.asarray(times, dtype='<i4') for times, _ in columns]) if columns else np.zeros(0, '<i4')
+    mids = np.concatenate([np.asarray(mids, dtype='<f4') for _, mids in columns]) if columns else np.zeros(0, '<f4')
+
+    # write next to the target and swap in, readers never see a partial file
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(COLUMNAR_MAGIC)
+        f.write(struct.pack('<Q', len(encoded)))
+        f.write(encoded)
+        f.write(b'\0' * (header["timeOffset"] - f.tell()))
+        f.write(times.tobytes())
+        f.write(b'\0' * (header["midOffset"] - f.tell()))
+        f.write(mids.tobytes())
+    os.replace(temp_path, path)
+
+'''
+every minute of the session in HMMSSmmm format
+'''
+def minute_grid(open_minute=SESSION_OPEN_MINUTE, close_minute=SESSION_CLOSE_MINUTE):
+    minutes = np.arange(open_minute, close_minute + 1)
+    return (minutes // 60) * 10000000 + (minutes % 60) * 100000
+
+'''
+atm anchor for each minute: the strike where call and put mids cross
+'''
+def compute_metadata(chain):
+    strikes = np.intersect1d(chain.strikes('call'), chain.strikes('put'))
+    times = minute_grid()
+
+    # distance between call and put mid, inf where either is missing
+    gap = np.abs(chain.mids_at(strikes, times, 'call') - chain.mids_at(strikes, times, 'put'))
+    gap[np.isnan(gap)] = np.inf
+    closest = np.argmin(gap, axis=0) if len(strikes) else np.zeros(len(times), dtype=int)
+    quoted = np.isfinite(gap.min(axis=0)) if len(strikes) else np.zeros(len(times), dtype=bool)
+
+    return {
+        "date": chain.date,
+        "source": chain.source,
+        "atm": {
+            "times": times[quoted].tolist(),
+            "strikes": strikes[closest[quoted]].tolist()
+        }
+    }
+
+def read_metadata(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_metadata(path, meta):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(meta, f, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+'''
+sorted trading dates available under the base path in either format
+'''
+def list_dates(base_path):
+    dates = set()
+    for file_name in os.listdir(base_path):
+        for extension in (".zip", COLUMNAR_EXTENSION):
+            if file_name.endswith(extension):
+                dates.add(file_name[:-len(extension)])
+    return sorted(dates)
+
+'''
+dates of a sorted catalog inside [start_date, end_date], in the days list and on the weekdays,
+dates may be given as YYYYMMDD or YYYY-MM-DD, weekdays as names (mon, monday) or 0-6 from monday
+'''
+def select_dates(catalog, start_date=None, end_date=None, days=None, weekdays=None):
+    def normalize(date):
+        return str(date).replace("-", "").strip()
+
+    # range is two binary searches on the sorted catalog
+    low = bisect_left(catalog, normalize(start_date)) if start_date else 0
+    high = bisect_right(catalog, normalize(end_date)) if end_date else len(catalog)
+    dates = catalog[low:high]
+
+    if days is not None:
+        wanted = {normalize(day) for day in days}
+        dates = [date for date in dates if date in wanted]
+
+    if weekdays is not None:
+        wanted = set()
+        for weekday in weekdays:
+            if isinstance(weekday, int) and 0 <= weekday < 7:
+                wanted.add(weekday)
+            elif isinstance(weekday, str) and weekday.strip().lower()[:3] in WEEKDAYS:
+                wanted.add(WEEKDAYS.index(weekday.strip().lower()[:3]))
+            else:
+                raise ValueError(f"unknown weekday {weekday}")
+        dates = [date for date in dates if datetime.strptime(date, "%Y%m%d").weekday() in wanted]
+    return dates
+
+'''
+ticks of a series in time order, the leg merge relies on it, ticks out of order are sorted
+keeping equal timestamps in file order
+'''
+def in_time_order(data, label):
+    times = data['time']
+    if np.all(times[1:] >= times[:-1]):
+        return data
+    print(f"{label}: ticks out of time order, sorted")
+    order = np.argsort(times, kind='stable')
+    if isinstance(data, dict):
+        return {'time': times[order], 'mid': data['mid'][order]}
+    return data[order]
+
+'''
+first mid at or after each timestamp, nan past the last tick
+'''
+def lookup_mids(times, mids, timestamps):
+    index = np.searchsorted(times, timestamps, side='left')
+    found = index < len(times)
+    out = np.full(np.shape(timestamps), np.nan, dtype=np.float32)
+    out[found] = mids[index[found]]
+    return out
+
+'''
+first mid at or after the timestamp, none past the last tick
+'''
+def lookup_mid(times, mids, timestamp):
+    index = np.searchsorted(times, timestamp, side='left')
+    if index < len(times):
+        return mids[index]
+    return None
+
+'''
+bounded lru of day chains shared by every lookup in the process
+'''
+class ChainCache:
+    def __init__(self, base_path, max_days=MAX_CACHED_DAYS):
+        self.base_path = base_path
+        self.max_days = max_days
+        self.days = OrderedDict()
+        self.stamps = {}
+        self.catalog = []
+        self.catalog_mtime = None
+
+    '''
+    sorted dates on disk, the directory is listed again only when it changes
+    '''
+    def dates(self):
+        mtime = os.stat(self.base_path).st_mtime_ns
+        if mtime != self.catalog_mtime:
+            self.catalog = list_dates(self.base_path)
+            self.catalog_mtime = mtime
+        return self.catalog
+
+    def day(self, date, resolution=None):
+        key = date if resolution is None else (date, resolution)
+        chain = self.days.get(key)
+        if chain is not None:
+            self.days.move_to_end(key)
+            return chain
+
+        stamp = self.stamp(date)
+        chain = self.open_day(date, resolution)
+
+        # evict least recently used
+        self.days[key] = chain
+        self.stamps[key] = stamp
+        while len(self.days) > self.max_days:
+            evicted, _ = self.days.popitem(last=False)
+            self.stamps.pop(evicted, None)
+        return chain
+
+    '''
+    path, size and mtime of the day's file, replacing or re-ingesting the day changes it
+    '''
+    def stamp(self, date):
+        path = self.day_path(date)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return path, stat.st_size, stat.st_mtime_ns
+
+    '''
+    drops cached days (of the given dates, or all) whose file changed since they were opened,
+    they are opened again on next use
+    '''
+    def validate(self, dates=None):
+        wanted = None if dates is None else set(dates)
+        stamps = {}
+        for key in list(self.days):
+            date = key[0] if isinstance(key, tuple) else key
+            if wanted is not None and date not in wanted:
+                continue
+            if date not in stamps:
+                stamps[date] = self.stamp(date)
+            if stamps[date] is None or stamps[date] != self.stamps.get(key):
+                del self.days[key]
+                self.stamps.pop(key, None)
+
+    '''
+    path of the day's file on disk, the columnar store if ingested, else the zip archive
+    '''
+    def day_path(self, date):
+        columnar_path = f'{self.base_path}{date}{COLUMNAR_EXTENSION}'
+        if os.path.exists(columnar_path):
+            return columnar_path
+        return f'{self.base_path}{date}.zip'
+
+    def open_day(self, date, resolution=None):
+        path = self.day_path(date)
+        if path.endswith(COLUMNAR_EXTENSION):
+            return ColumnarDayChain(path, date, resolution)
+        if resolution is not None:
+            raise ValueError(f"{date} has no resolution {resolution}, ingest it into the columnar store first")
+        return DayChain(path, date)
+
+    '''
+    decodes days up front until the memory ceiling or the lru size is reached,
+    newest first since recent days are queried most
+    '''
+    def preload(self, dates, max_bytes):
+        start = time.time()
+        loaded, total_bytes = [], 0
+        for date in reversed(dates[-self.max_days:]):
+            total_bytes += self.day(date).preload()
+            loaded.append(date)
+            if total_bytes >= max_bytes:
+                break
+
+        # newest is most recently used, older warm days are evicted first
+        for date in reversed(loaded):
+            self.days.move_to_end(date)
+        return {"days": len(loaded), "bytes": total_bytes, "seconds": round(time.time() - start, 3)}
+
+    def clear(self):
+        self.days.clear()
+        self.stamps.clear()
@@ -0,0 +1,175 @@
+import os
+import numpy as np
+
+# long series are scanned coarse to fine: block envelopes first, then ticks inside matching blocks
+COARSE_TO_FINE_STEPS = int(os.environ.get("COARSE_TO_FINE_STEPS", "4096"))
+COARSE_BLOCK = int(os.environ.get("COARSE_BLOCK", "64"))
+
+'''
+as-of joined state of two legs after every step of the time merge,
+matching the two pointer walk: equal timestamps advance both legs together
+and the starting state (first tick of each leg) is never evaluated
+both legs must be in time order, DayChain.load sorts series that are not
+'''
+class SpreadSeries:
+    def __init__(self, times1, mids1, times2, mids2):
+        next1 = times1[1:]
+        next2 = times2[1:]
+
+        # repeated timestamps in one leg are consumed one per step
+        rank1 = np.arange(len(next1)) - np.searchsorted(next1, next1, side='left')
+        rank2 = np.arange(len(next2)) - np.searchsorted(next2, next2, side='left')
+
+        # merge both legs, steps are unique (time, rank) pairs
+        times = np.concatenate((next1, next2))
+        ranks = np.concatenate((rank1, rank2))
+        legs = np.concatenate((np.zeros(len(next1), dtype=np.int8), np.ones(len(next2), dtype=np.int8)))
+        order = np.lexsort((legs, ranks, times))
+        times = times[order]
+        ranks = ranks[order]
+        legs = legs[order]
+        changed = (times[1:] != times[:-1]) | (ranks[1:] != ranks[:-1])
+        step_end = np.flatnonzero(np.append(changed, True))[:len(times)]
+
+        # ticks consumed per leg are the current index into each leg
+        index1 = np.cumsum(legs == 0)[step_end]
+        index2 = np.cumsum(legs == 1)[step_end]
+
+        self.time1 = times1[index1]
+        self.time2 = times2[index2]
+        self.position = mids1[index1] - mids2[index2]
+
+        # compare in double precision like the scalar loop did
+        self.position64 = self.position.astype(np.float64)
+        self.block_max = None
+        self.block_min = None
+
+    def __len__(self):
+        return len(self.position)
+
+    def fill(self, step):
+        return min(self.time1[step], self.time2[step]), round(self.position[step], 3)
+    
+    '''
+    fill times and prices of many steps, -1 / nan where the step is -1
+    '''
+    def fills(self, steps):
+        hit = steps >= 0
+        times = np.full(len(steps), -1, dtype=self.time1.dtype)
+        prices = np.full(len(steps), np.nan, dtype=self.position.dtype)
+        times[hit] = np.minimum(self.time1[steps[hit]], self.time2[steps[hit]])
+        prices[hit] = np.round(self.position[steps[hit]], 3)
+        return times, prices
+    
+    '''
+    first step where both legs have ticked after the timestamp, every later step has too
+    '''
+    def active_start(self, timestamp):
+        # a timestamp of the column dtype keeps searchsorted from casting the whole column
+        return max(np.searchsorted(self.time1, self.time1.dtype.type(timestamp), side='right'), np.searchsorted(self.time2, self.time2.dtype.type(timestamp), side='right'))
+    
+    '''
+    first step at or after start where both legs have ticked after the timestamp
+    and low < position < high (no upper limit when high is none), none if there is no such step
+    '''
+    def first_between(self, timestamp, low, high, start=0):
+        position = self.position64
+        begin = max(start, self.active_start(timestamp))
+        if len(position) - begin < COARSE_TO_FINE_STEPS:
+            hits = np.flatnonzero(between(position[begin:], low, high))
+            return begin + hits[0] if len(hits) else None
+        return self.coarse_to_fine(begin, low, high)
+    
+    '''
+    first step above each level after the timestamp, -1 where the position never gets there
+    the running max of the position is sorted, so one searchsorted answers every level
+    '''
+    def first_above(self, timestamp, levels):
+        steps = np.arange(self.active_start(timestamp), len(self.position64))
+        levels = np.asarray(levels, dtype=np.float64)
+        if len(steps) == 0:
+            return np.full(len(levels), -1)
+        
+        # nan ticks never pass a level
+        position = self.position64[steps]
+        running_max = np.maximum.accumulate(np.where(np.isnan(position), -np.inf, position))
+        index = np.searchsorted(running_max, levels, side='right')
+        return np.where(index < len(steps), steps[np.minimum(index, len(steps) - 1)], -1)
+    
+    '''
+    min and max of the position per block, nan ticks are ignored
+    '''
+    def envelope(self):
+        if self.block_max is None:
+            starts = np.arange(0, len(self.position64), COARSE_BLOCK)
+            self.block_max = np.fmax.reduceat(self.position64, starts)
+            self.block_min = np.fmin.reduceat(self.position64, starts)
+        return self.block_min, self.block_max
+    
+    '''
+    scans block envelopes for blocks that could hold a match, then confirms on ticks only inside them
+    '''
+    def coarse_to_fine(self, begin, low, high):
+        position = self.position64
+        block_min, block_max = self.envelope()
+        
+        # rest of the block the scan starts in
+        first_block = begin // COARSE_BLOCK
+        head_end = min((first_block + 1) * COARSE_BLOCK, len(position))
+        hits = np.flatnonzero(between(position[begin:head_end], low, high))
+        if len(hits):
+            return begin + hits[0]
+        
+        # later blocks whose range overlaps (low, high)
+        overlaps = block_max[first_block + 1:] > low
+        if high is not None:
+            overlaps &= block_min[first_block + 1:] < high
+        for block in np.flatnonzero(overlaps) + first_block + 1:
+            block_start = block * COARSE_BLOCK
+            hits = np.flatnonzero(between(position[block_start:block_start + COARSE_BLOCK], low, high))
+            if len(hits):
+                return block_start + hits[0]
+        return None
+
+def between(values, low, high):
+    if high is None:
+        return values > low
+    return (values > low) & (values < high)
+
+'''
+combined short - long series, none if either leg has no data
+'''
+def build_spread_series(times1, mids1, times2, mids2):
+    if len(times1) == 0 or len(times2) == 0:
+        return None
+    return SpreadSeries(times1, mids1, times2, mids2)
+
+'''
+first fill inside (limit, stop) once the position has traded above stop
+'''
+def stop_limit_fill(series, entry_time, stop_price, limit_price):
+    # stop limit triggered
+    start = series.first_between(entry_time, stop_price, None)
+    if start is None:
+        return None, None
+
+    # exit condition
+    step = series.first_between(entry_time, limit_price, stop_price, start)
+    if step is None:
+        return None, None
+    return series.fill(step)
+
+'''
+first point where the position exceeds the stop level
+'''
+def stop_loss_fill(series, timestamp, stop_level):
+    step = series.first_between(timestamp, stop_level, None)
+    if step is None:
+        return None, None
+    return series.fill(step)
+
+'''
+stop_loss_fill for many stop levels at once, stop times and prices with -1 / nan where never stopped
+'''
+def stop_loss_fills(series, timestamp, stop_levels):
+    return series.fills(series.first_above(timestamp, stop_levels))
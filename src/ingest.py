@@ -0,0 +1,135 @@
+import os
+import gzip
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from .chain import CHAIN_DTYPE, COLUMNAR_EXTENSION, METADATA_EXTENSION, ColumnarDayChain, DayChain, compute_metadata, in_time_order, write_columnar, write_metadata
+
+# keep a tick only once this much time (HMMSSmmm units) has passed since the last kept one
+THIN_GAP = int(os.environ.get("THIN_GAP", "60000"))
+
+# extra resolutions stored next to the default one: raw, 5s, 60s and 5min
+PYRAMID_LEVELS = [int(level) for level in os.environ.get("PYRAMID_LEVELS", "0,5000,60000,500000").split(",") if level]
+
+'''
+indices kept by the "at least gap since the last kept tick" rule
+every tick jumps to the first tick gap later, kept ticks are the jumps reachable from the first,
+found by pointer doubling so the whole walk is a few array gathers
+'''
+def thin_ticks(times, gap=THIN_GAP):
+    if len(times) == 0 or gap <= 0:
+        return np.arange(len(times))
+
+    # out of order ticks break the jump, take them one by one like the original loop
+    if np.any(times[1:] < times[:-1]):
+        keep = [0]
+        for i in range(1, len(times)):
+            if times[i] - times[keep[-1]] >= gap:
+                keep.append(i)
+        return np.array(keep)
+
+    # jump table with a sentinel at the end that points to itself
+    jump = np.append(np.searchsorted(times, times.astype(np.int64) + gap, side='left'), len(times))
+    kept = np.zeros(1, dtype=np.int64)
+    while kept[-1] < len(times):
+        kept = np.concatenate((kept, jump[kept]))
+        jump = jump[jump]
+    return kept[kept < len(times)]
+
+'''
+every series of a day as name -> times, mids in time order, from a raw folder of gzip files or a day zip
+'''
+def read_day(data_path, date):
+    folder_path = os.path.join(data_path, date)
+    series = {}
+    if os.path.isdir(folder_path):
+        for file_name in os.listdir(folder_path):
+            with gzip.open(os.path.join(folder_path, file_name), 'rb') as f:
+                data = in_time_order(np.frombuffer(f.read(), dtype=CHAIN_DTYPE), f"{date} {file_name}")
+            series[file_name] = (data['time'], data['mid'])
+    else:
+        chain = DayChain(f'{data_path}{date}.zip', date)
+        for name in chain.names():
+            data = in_time_order(chain.read(name), f"{date} {name}")
+            series[name] = (data['time'], data['mid'])
+    return series
+
+'''
+thins one day to the default resolution and every pyramid level, then writes the columnar store
+and metadata sidecar, returns ticks in, ticks out at the default resolution
+'''
+def convert_day(data_path, out_path, date, gap=THIN_GAP, levels=PYRAMID_LEVELS):
+    raw = read_day(data_path, date)
+    ticks_in = sum(len(times) for times, _ in raw.values())
+
+    pyramid = {}
+    for level in set(levels) | {gap}:
+        pyramid[level] = {}
+        for name, (times, mids) in raw.items():
+            keep = thin_ticks(times, level)
+            pyramid[level][name] = (times[keep], mids[keep])
+    series = pyramid.pop(gap)
+
+    columnar_path = f'{out_path}{date}{COLUMNAR_EXTENSION}'
+    write_columnar(columnar_path, date, series, resolution=gap, levels=pyramid)
+    write_metadata(f'{out_path}{date}{METADATA_EXTENSION}', compute_metadata(ColumnarDayChain(columnar_path, date)))
+    return ticks_in, sum(len(times) for times, _ in series.values())
+
+'''
+raw date folders and day zips under the data path
+'''
+def list_sources(data_path):
+    dates = set()
+    for file_name in os.listdir(data_path):
+        if os.path.isdir(os.path.join(data_path, file_name)):
+            dates.add(file_name)
+        elif file_name.endswith(".zip"):
+            dates.add(file_name[:-4])
+    return sorted(dates)
+
+'''
+converts every day under data_path (or only the given dates), days run in parallel
+'''
+def ingest(data_path, out_path, dates=None, gap=THIN_GAP, levels=PYRAMID_LEVELS, workers=None):
+    os.makedirs(out_path, exist_ok=True)
+    if not dates:
+        dates = list_sources(data_path)
+    workers = workers or os.cpu_count()
+
+    start = time.time()
+    total_in, total_out = 0, 0
+    if workers > 1 and len(dates) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            converted = list(pool.map(convert_day, repeat(data_path), repeat(out_path), dates, repeat(gap), repeat(levels)))
+    else:
+        converted = [convert_day(data_path, out_path, date, gap, levels) for date in dates]
+
+    for date, (ticks_in, ticks_out) in zip(dates, converted):
+        total_in += ticks_in
+        total_out += ticks_out
+        print(f"{date}: {ticks_in} -> {ticks_out} ticks")
+
+    seconds = max(time.time() - start, 1e-9)
+    megabytes = total_in * CHAIN_DTYPE.itemsize / 1024 / 1024
+    print(f"converted {len(dates)} days, {total_in} -> {total_out} ticks in {seconds:.2f}s "
+          f"({total_in / seconds:.0f} ticks/s, {megabytes / seconds:.1f} MB/s, {workers} workers)")
+    return {"days": len(dates), "ticksIn": total_in, "ticksOut": total_out, "seconds": round(seconds, 3)}
+
+'''
+usage: python -m src.ingest [data_path] [out_path] [date ...] [--gap 60000] [--levels 0,5000,60000,500000] [--workers N]
+data_path holds raw date folders of gzip strike files and/or day zips, --gap 0 keeps every tick
+as the default resolution, --levels "" stores no extra resolutions
+'''
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("data_path", nargs="?", default="src/data/")
+    parser.add_argument("out_path", nargs="?")
+    parser.add_argument("dates", nargs="*")
+    parser.add_argument("--gap", type=int, default=THIN_GAP)
+    parser.add_argument("--levels", default=",".join(str(level) for level in PYRAMID_LEVELS))
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",") if level]
+    ingest(args.data_path, args.out_path or args.data_path, args.dates, args.gap, levels, args.workers)
@@ -1,97 +1,60 @@
 import json
 import os
-import gzip
-import zipfile
+import threading
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from datetime import datetime
+from .chain import ChainCache, lookup_mid, select_dates
+from .engine import stop_limit_fill, stop_loss_fill, stop_loss_fills
+from .sweep import MAX_SWEEP_SIZE, is_sweep, expand_grid, expand_values
+from .cache import DayMemo, ResultCache, SingleFlight, dataset_fingerprint, day_fingerprints
+from .timing import TIMINGS, timings, timed
+from .shared import SHARED_CHAINS, SharedChainCache
+from .analysis import BOOTSTRAP_CONFIDENCE, BOOTSTRAP_RUIN_LEVEL, BOOTSTRAP_SAMPLES, bootstrap, walk_forward_select, walk_forward_windows
 
 MAX_RANGE = 50
 BUFFER = 0
 BASE_PATH = "function/src/data/"
 #BASE_PATH = "src/data/"
+WORKERS = int(os.environ.get("PW_VEIC_WORKERS", "1"))
+PRELOAD = os.environ.get("PRELOAD_CHAINS", "1") == "1"
+PRELOAD_MAX_MB = float(os.environ.get("PRELOAD_MAX_MB", "512"))
+RESULT_CACHE = os.environ.get("RESULT_CACHE", "1") == "1"
+DAY_MEMO = os.environ.get("DAY_MEMO", "1") == "1"
 
-search_bounds = {
-    "20240201": {
-        "lower": 4860-BUFFER,
-        "upper": 4860+BUFFER
-    },
-    "20240202": {
-        "lower": 4915-BUFFER,
-        "upper": 4915+BUFFER
-    },
-    "20240205": {
-        "lower": 4955-BUFFER,
-        "upper": 4955+BUFFER
-    },
-    "20240206": {
-        "lower": 4950-BUFFER,
-        "upper": 4950+BUFFER
-    },
-    "20240207": {
-        "lower": 4970-BUFFER,
-        "upper": 4970+BUFFER
-    },
-    "20240208": {
-        "lower": 4995-BUFFER,
-        "upper": 4995+BUFFER
-    },
-    "20240209": {
-        "lower": 5000-BUFFER,
-        "upper": 5000+BUFFER
-    },
-    "20240212": {
-        "lower": 5025-BUFFER,
-        "upper": 5025+BUFFER
-    },
-    "20240213": {
-        "lower": 4965-BUFFER,
-        "upper": 4965+BUFFER
-    },
-    "20240214": {
-        "lower": 4975-BUFFER,
-        "upper": 4975+BUFFER
-    },
-    "20240215": {
-        "lower": 5000-BUFFER,
-        "upper": 5000+BUFFER
-    },
-    "20240216": {
-        "lower": 5030-BUFFER,
-        "upper": 5030+BUFFER
-    },
-    "20240220": {
-        "lower": 4990-BUFFER,
-        "upper": 4990+BUFFER
-    },
-    "20240221": {
-        "lower": 4965-BUFFER,
-        "upper": 4965+BUFFER
-    },
-    "20240222": {
-        "lower": 5040-BUFFER,
-        "upper": 5050+BUFFER
-    },
-    "20240223": {
-        "lower": 5100-BUFFER,
-        "upper": 5100+BUFFER
-    },
-    "20240226": {
-        "lower": 5095-BUFFER,
-        "upper": 5095+BUFFER
-    },
-    "20240227": {
-        "lower": 5075-BUFFER,
-        "upper": 5075+BUFFER
-    },
-    "20240228": {
-        "lower": 5065-BUFFER,
-        "upper": 5065+BUFFER
-    },
-    "20240229": {
-        "lower": 5085-BUFFER,
-        "upper": 5085+BUFFER
-    },
-}
+# bump when a code change alters per-day results
+DAY_MEMO_VERSION = 1
+
+# bump when a code change alters response bodies
+RESULT_CACHE_VERSION = 1
+
+# request fields that narrow the days a backtest runs on
+DATE_FIELDS = ["startDate", "endDate", "days", "weekdays"]
+
+# request fields that do not change the result
+CACHE_IGNORED_FIELDS = ["workers", "timings"]
+
+# one filled trade, no stop out is stored as -1 / nan
+TRADE_DTYPE = np.dtype([('call', '?'), ('short_strike', 'i4'), ('long_strike', 'i4'), ('credit', 'f4'), ('entry_time', 'i4'), ('entry_credit', 'f4'), ('stop_time', 'i4'), ('stop_price', 'f4'), ('profit', 'f4')])
+
+# decoded option chains shared across lookups, and across processes on the box in shared mode
+chain_cache = SharedChainCache(BASE_PATH) if SHARED_CHAINS else ChainCache(BASE_PATH)
+
+# warm up on import so a warm container answers from memory
+preload_stats = None
+if PRELOAD and os.path.isdir(BASE_PATH):
+    preload_stats = chain_cache.preload(chain_cache.dates(), PRELOAD_MAX_MB * 1024 * 1024)
+    print(f"preloaded {preload_stats['days']} days, {preload_stats['bytes'] / 1024 / 1024:.1f} MB in {preload_stats['seconds']}s")
+
+# finished responses on local disk, keyed by parameters and dataset
+result_cache = ResultCache()
+
+# per day results, only days that are new or changed get recomputed
+day_memo = DayMemo()
+
+# identical requests arriving together share one backtest
+single_flight = SingleFlight()
 
 class Spread:
     def __init__(self, short_strike, long_strike, credit, call_or_put):
@@ -113,6 +76,11 @@ class TradeStats:
         self.win_rate = 0.0
         self.max_daily_win = 0.0
         self.max_daily_loss = 0.0
+        self.max_drawdown = 0.0
+        
+        # ledger, one structured array of raw trades per day
+        self.day_dates = []
+        self.day_trades = []
         
         # graph data
         self.dates = []
@@ -120,46 +88,47 @@ class TradeStats:
         self.daily_losses = []
         self.daily_profits = []
         
-        # spread data
-        self.spread_date = []
-        self.spread_type = []
-        self.spread_spread = []
-        self.spread_credit_at_open = []
-        self.spread_execution_time = []
-        self.spread_execution_credit = []
-        self.spread_stop_out_time = []
-        self.spread_stop_out_price = []
-        self.spread_profit = []
-        
-    def update_spread_stats(self, date, type, spread, credit_at_open, execution_time, execution_credit, stop_out_time, stop_out_price, profit):
-        # format date
-        date_obj = datetime.strptime(date, "%Y%m%d")
-        formatted_date = date_obj.strftime("%b %d, %Y")
-    
-        self.spread_date.append(formatted_date)
-        self.spread_type.append(type)
-        self.spread_spread.append(spread)
-        self.spread_credit_at_open.append(credit_at_open)
-        self.spread_execution_time.append(f"{execution_time[0:2]}:{execution_time[2:4]}")
-        self.spread_execution_credit.append(execution_credit)
-        self.spread_stop_out_time.append(f"{stop_out_time[0:2]}:{stop_out_time[2:4]}" if stop_out_time != "None" else "None")
-        self.spread_stop_out_price.append(stop_out_price)
-        self.spread_profit.append(round(profit, 2))
-    
-    def update_daily_stats(self, daily_loss, daily_profit, date):
-        if (daily_loss) < self.max_daily_loss:
-            self.max_daily_loss = round(daily_loss, 2)
-        if (daily_profit) > self.max_daily_win:
-            self.max_daily_win = round(daily_profit, 2)
+        # unrounded net p&l per day for analysis
+        self.daily_pnl = np.zeros(0)
         
-        self.profit_over_time.append(round(self.total_profit, 2))
-        self.daily_losses.append(round(daily_loss, 2))
-        self.daily_profits.append(round(daily_profit, 2))
-        self.dates.append(date)        
+        # spread data, concatenated ledger
+        self.trade_dates = np.zeros(0, dtype=np.int32)
+        self.trades = np.zeros(0, dtype=TRADE_DTYPE)
         
+    def add_day(self, day_result):
+        self.day_dates.append(int(day_result.date))
+        self.day_trades.append(day_result.trades)
+    
+    '''
+    all stats in one vectorized pass over the ledger, sums keep trade order
+    '''
     def update_final_stats(self):
+        counts = [len(trades) for trades in self.day_trades]
+        self.trades = np.concatenate(self.day_trades) if self.day_trades else np.zeros(0, dtype=TRADE_DTYPE)
+        self.trade_dates = np.repeat(np.array(self.day_dates, dtype=np.int32), counts)
+        
+        daily_profits, daily_losses, profit_over_time = daily_totals(self.trades, np.repeat(np.arange(len(counts)), counts), len(counts))
+        
+        # overall stats
+        self.total_trades = len(self.trades)
+        self.lose_count = int((self.trades['stop_time'] >= 0).sum())
+        self.win_count = self.total_trades - self.lose_count
         self.win_rate = round((self.win_count / self.total_trades) * 100, 2) if self.total_trades > 0 else 0.0
-        self.total_profit = round(self.total_profit, 2)
+        self.total_profit = round(profit_over_time[-1], 2) if len(profit_over_time) else 0.0
+        self.max_daily_win = round(daily_profits.max(), 2) if len(counts) and daily_profits.max() > 0 else 0.0
+        self.max_daily_loss = round(daily_losses.min(), 2) if len(counts) and daily_losses.min() < 0 else 0.0
+        
+        # deepest fall of the equity curve from its running peak
+        drawdowns = profit_over_time - np.maximum.accumulate(np.maximum(profit_over_time, 0.0)) if len(counts) else np.zeros(1)
+        self.max_drawdown = round(min(drawdowns.min(), 0.0), 2)
+        
+        self.daily_pnl = daily_profits + daily_losses
+        
+        # graph data
+        self.dates = [str(date) for date in self.day_dates]
+        self.profit_over_time = np.round(profit_over_time, 2).tolist()
+        self.daily_losses = np.round(daily_losses, 2).tolist()
+        self.daily_profits = np.round(daily_profits, 2).tolist()
     
     def __str__(self):
         return (f"Total Profit: {self.total_profit}, "
@@ -169,274 +138,573 @@ class TradeStats:
                 f"Win Rate: {self.win_rate:.2f}%, "
                 f"Max Daily Win: {self.max_daily_win}, "
                 f"Max Daily Loss: {self.max_daily_loss}, "
+                f"Max Drawdown: {self.max_drawdown}, "
                 f"\n\nDates: {self.dates}, "
                 f"\n\nProfit Over Time: {self.profit_over_time}, "
                 f"\n\nDaily Losses: {self.daily_losses}, "
-                f"\n\nDaily Profits: {self.daily_profits}, "
-                
-                f"\n\nSpread Dates: {self.spread_date}, "
-                f"\n\nSpread Types: {self.spread_type}, "
-                f"\n\nSpread Spreads: {self.spread_spread}, "
-                f"\n\nSpread Credit at Open: {self.spread_credit_at_open}, "
-                f"\n\nSpread Execution Times: {self.spread_execution_time}, "
-                f"\n\nSpread Execution Credits: {self.spread_execution_credit}, "
-                f"\n\nSpread Stop Out Times: {self.spread_stop_out_time}, "
-                f"\n\nSpread Stop Out Prices: {self.spread_stop_out_price}, "
-                f"\n\nSpread Profits: {self.spread_profit}")
+                f"\n\nDaily Profits: {self.daily_profits}")
+
+'''
+daily wins, daily losses and running profit at each day end
+bincount and cumsum add in trade order, so totals match a running sum
+'''
+def daily_totals(trades, trade_days, num_days, start_profit=0.0):
+    profits = trades['profit'].astype(np.float64) * 100
+    stopped = trades['stop_time'] >= 0
+    
+    # bincount falls back to int counts when nothing is binned
+    daily_profits = np.bincount(trade_days[~stopped], weights=profits[~stopped], minlength=num_days).astype(np.float64)
+    daily_losses = np.bincount(trade_days[stopped], weights=profits[stopped], minlength=num_days).astype(np.float64)
+    
+    # running total after each trade, sampled at the last trade of each day
+    running_profit = np.cumsum(np.concatenate(([start_profit], profits)))
+    profit_over_time = running_profit[np.cumsum(np.bincount(trade_days, minlength=num_days))]
+    return daily_profits, daily_losses, profit_over_time
 
 '''
 finds mid price closest to the timestamp
 '''
 def get_mid_price(date, file_name, timestamp, call_or_put):
-    try:
-        # open file
-        with zipfile.ZipFile(f'{BASE_PATH}{date}.zip', 'r') as zf:
-            prefix = 'C' if call_or_put == 'call' else 'P'
-            with zf.open(f'{date}/{prefix}{file_name}') as cf:
-                with gzip.GzipFile(fileobj=cf) as gz:
-                    data = np.frombuffer(gz.read(), dtype=np.dtype([('time', 'i4'), ('mid', 'f4')]))
-                    times = data['time']
-                    mids = data['mid']
-                    
-                    # find price closed to timestamp
-                    for i in range(len(times)):
-                        if times[i] >= timestamp:
-                            return mids[i]
+    data = chain_cache.day(date).load(file_name, call_or_put)
+    
     # if file not found
-    except KeyError:
+    if data is None:
         return None
+    
+    # find price closed to timestamp
+    return lookup_mid(data['time'], data['mid'], timestamp)
 
 '''
 short call: sell, lower strike, want to expire worthless
 long call: buy, upper strike, caps max loss if price rises
 '''
 def find_bearish_call_spreads(date, timestamp_of_entry, entry_credit, spread_width, num_spreads, upper_bound):
-    spreads = []
-    
-    for short_strike in range(upper_bound, upper_bound+MAX_RANGE, 5):
-        long_strike = short_strike + spread_width
-        
-        # get mid price    
-        short_strike_price = get_mid_price(date, short_strike, timestamp_of_entry, 'call')
-        long_strike_price = get_mid_price(date, long_strike, timestamp_of_entry, 'call')
-
-        # calculate credit received
-        credit_received = None
-        if short_strike_price is not None and long_strike_price is not None:
-            credit_received = round(short_strike_price - long_strike_price, 3)
-        
-        # check if credit received meets entry credit
-        if credit_received is not None and credit_received >= entry_credit:
-            spreads.append(Spread(short_strike, long_strike, credit_received, 'call'))
-            if len(spreads) == num_spreads:
-                return spreads
-    return spreads
+    return find_spreads_batch([(date, timestamp_of_entry, upper_bound)], entry_credit, spread_width, num_spreads, 'call')[0]
 
 '''
 short put: sell, higher strike, want to expire worthless
 long put: buy, lower strike, caps max loss if price crashes
 '''
 def find_bullish_put_spreads(date, timestamp_of_entry, entry_credit, spread_width, num_spreads, lower_bound):
-    spreads = []
+    return find_spreads_batch([(date, timestamp_of_entry, lower_bound)], entry_credit, spread_width, num_spreads, 'put')[0]
+
+'''
+short strikes walking away from the bound, calls up and puts down, where both legs are listed
+'''
+def candidate_short_strikes(chain, bound, spread_width, call_or_put):
+    if call_or_put == 'call':
+        short_strikes = np.arange(bound, bound+MAX_RANGE, 5)
+        long_strikes = short_strikes + spread_width
+    else:
+        short_strikes = np.arange(bound, bound-MAX_RANGE, -5)
+        long_strikes = short_strikes - spread_width
+    listed = chain.strikes(call_or_put)
+    return short_strikes[np.isin(short_strikes, listed) & np.isin(long_strikes, listed)]
+
+'''
+spreads for many (date, monitor time, bound) rows at once, a none bound (no quotes) gives no spreads
+mids fill a row x candidate matrix with one as-of lookup per strike and day, then credits and
+the first num_spreads qualifying candidates of every row come out of one array pass
+'''
+@timed("spread_discovery")
+def find_spreads_batch(rows, entry_credit, spread_width, num_spreads, call_or_put, resolution=None):
+    direction = 1 if call_or_put == 'call' else -1
+    max_candidates = len(range(0, MAX_RANGE, 5))
+    
+    # row x candidate matrices, padding is never listed
+    short_strikes = np.zeros((len(rows), max_candidates), dtype=int)
+    listed = np.zeros((len(rows), max_candidates), dtype=bool)
+    short_strike_prices = np.full((len(rows), max_candidates), np.nan, dtype=np.float32)
+    long_strike_prices = np.full((len(rows), max_candidates), np.nan, dtype=np.float32)
     
-    for short_strike in range(lower_bound, lower_bound-MAX_RANGE, -5):
-        long_strike = short_strike - spread_width
-        
-        # get mid price
-        long_strike_price = get_mid_price(date, long_strike, timestamp_of_entry, 'put')
-        short_strike_price = get_mid_price(date, short_strike, timestamp_of_entry, 'put')
-        
-        # calculate credit received
-        credit_received = None
-        if long_strike_price is not None and short_strike_price is not None:
-            credit_received = round(short_strike_price - long_strike_price, 3)
-        
-        # check if credit received meets entry credit        
-        if credit_received is not None and credit_received >= entry_credit:
-            spreads.append(Spread(short_strike, long_strike, credit_received, 'put'))
-            if len(spreads) == num_spreads:
-                return spreads
+    day_rows = {}
+    for row, (date, _, bound) in enumerate(rows):
+        if bound is not None:
+            day_rows.setdefault(date, []).append(row)
+    
+    for date, indices in day_rows.items():
+        chain = chain_cache.day(date, resolution)
+        candidates = [candidate_short_strikes(chain, rows[row][2], spread_width, call_or_put) for row in indices]
+        
+        # every candidate at every monitor time of the day, strike x time
+        short_axis = np.unique(np.concatenate(candidates))
+        times, columns = np.unique([rows[row][1] for row in indices], return_inverse=True)
+        short_mids = chain.mids_at(short_axis, times, call_or_put)
+        long_mids = chain.mids_at(short_axis + direction * spread_width, times, call_or_put)
+        
+        for row, column, strikes in zip(indices, columns, candidates):
+            axis_rows = np.searchsorted(short_axis, strikes)
+            short_strikes[row, :len(strikes)] = strikes
+            listed[row, :len(strikes)] = True
+            short_strike_prices[row, :len(strikes)] = short_mids[axis_rows, column]
+            long_strike_prices[row, :len(strikes)] = long_mids[axis_rows, column]
+    
+    # calculate credit received, missing prices stay nan
+    credits_received = np.round(short_strike_prices - long_strike_prices, 3)
+    long_strikes = short_strikes + direction * spread_width
+    
+    # check if credit received meets entry credit, keep the first num_spreads of each row
+    qualified = listed & (credits_received.astype(np.float64) >= entry_credit)
+    if num_spreads > 0:
+        qualified &= np.cumsum(qualified, axis=1) <= num_spreads
+    
+    spreads = [[] for _ in rows]
+    for row, i in zip(*np.nonzero(qualified)):
+        spreads[row].append(Spread(int(short_strikes[row, i]), int(long_strikes[row, i]), credits_received[row, i], call_or_put))
     return spreads
 
 '''
 stop limit order for entry
 '''
-def stop_limit_order(date, lower_strike, upper_strike, entry_time, stop_price, limit_price, option_type):
-    # load data from files
-    def load_option(strike, option_type):
-        prefix = 'C' if option_type == 'call' else 'P'
-        with zipfile.ZipFile(f'{BASE_PATH}{date}.zip', 'r') as zf:
-            with zf.open(f'{date}/{prefix}{strike}') as cf:
-                with gzip.GzipFile(fileobj=cf) as gz:
-                    data = np.frombuffer(gz.read(), dtype=np.dtype([('time', 'i4'), ('mid', 'f4')]))
-                    return data['time'], data['mid']
-    times1, mids1 = load_option(lower_strike, option_type)
-    times2, mids2 = load_option(upper_strike, option_type)
+@timed("stop_limit_order")
+def stop_limit_order(date, lower_strike, upper_strike, entry_time, stop_price, limit_price, option_type, resolution=None):
+    # combined position of both legs
+    series = chain_cache.day(date, resolution).spread(lower_strike, upper_strike, option_type)
 
     # exit if no data
-    if len(times1) == 0 or len(times2) == 0:
+    if series is None:
         return None, None
-
-    # initalize pointers
-    index1 = index2 = 0
-    cur_time1 = times1[0]
-    cur_time2 = times2[0]
-    cur_mid1 = mids1[0]
-    cur_mid2 = mids2[0]
-
-    # increment
-    index1 = 1 if len(times1) > 1 else len(times1)
-    index2 = 1 if len(times2) > 1 else len(times2)
-
-    stop_triggered = False
-
-    # iterate through both time series
-    while index1 < len(times1) or index2 < len(times2):
-        # get next timestamps
-        next_time1 = times1[index1] if index1 < len(times1) else float('inf')
-        next_time2 = times2[index2] if index2 < len(times2) else float('inf')
-
-        # increment the earliest time
-        if next_time1 <= next_time2:
-            cur_time1 = next_time1
-            cur_mid1 = mids1[index1]
-            index1 += 1
-        if next_time2 <= next_time1:
-            cur_time2 = next_time2
-            cur_mid2 = mids2[index2]
-            index2 += 1
-        
-        # only start after entry time
-        if cur_time1 > entry_time and cur_time2 > entry_time:
-            # calculate current position
-            current_pos = cur_mid1 - cur_mid2
-
-            # stop limit triggered
-            if current_pos > stop_price:
-                stop_triggered = True
-
-            # exit condition
-            if stop_triggered and current_pos < stop_price and current_pos > limit_price:
-                current_time = min(cur_time1, cur_time2)
-                return current_time, round(current_pos, 3)
-    return None, None
+    timings.count("ticks_scanned", len(series))
+    return stop_limit_fill(series, entry_time, stop_price, limit_price)
 
 '''
 stop loss for loss reduction
 '''
-def stop_loss(date, lower_strike, upper_strike, timestamp, entry_credit, stop_multiplier, option_type):
-    # load data from files
-    def load_option(strike, option_type):
-        prefix = 'C' if option_type == 'call' else 'P'
-        with zipfile.ZipFile(f'{BASE_PATH}{date}.zip', 'r') as zf:
-            with zf.open(f'{date}/{prefix}{strike}') as cf:
-                with gzip.GzipFile(fileobj=cf) as gz:
-                    data = np.frombuffer(gz.read(), dtype=np.dtype([('time', 'i4'), ('mid', 'f4')]))
-                    return data['time'], data['mid']
-    times1, mids1 = load_option(lower_strike, option_type)
-    times2, mids2 = load_option(upper_strike, option_type)
+@timed("stop_loss")
+def stop_loss(date, lower_strike, upper_strike, timestamp, entry_credit, stop_multiplier, option_type, resolution=None):
+    # combined position of both legs
+    series = chain_cache.day(date, resolution).spread(lower_strike, upper_strike, option_type)
 
     # exit if no data
-    if len(times1) == 0 or len(times2) == 0:
+    if series is None:
         return None, None
-
-    # initalize pointers
-    index1 = index2 = 0
-    cur_time1 = times1[0]
-    cur_time2 = times2[0]
-    cur_mid1 = mids1[0]
-    cur_mid2 = mids2[0]
-
-    # increment
-    index1 = 1 if len(times1) > 1 else len(times1)
-    index2 = 1 if len(times2) > 1 else len(times2)
+    timings.count("ticks_scanned", len(series))
     starting_pos = entry_credit * stop_multiplier
+    return stop_loss_fill(series, timestamp, starting_pos)
 
-    # iterate through both time series
-    while index1 < len(times1) or index2 < len(times2):
-        # get next timestamps
-        next_time1 = times1[index1] if index1 < len(times1) else float('inf')
-        next_time2 = times2[index2] if index2 < len(times2) else float('inf')
-
-        # increment the earliest time
-        if next_time1 <= next_time2:
-            cur_time1 = next_time1
-            cur_mid1 = mids1[index1]
-            index1 += 1
-        if next_time2 <= next_time1:
-            cur_time2 = next_time2
-            cur_mid2 = mids2[index2]
-            index2 += 1
-        
-        # only start after timestamp
-        if cur_time1 > timestamp and cur_time2 > timestamp:
-            # calculate current position
-            current_pos = cur_mid1 - cur_mid2
-
-            # check if stop loss triggered
-            if current_pos > starting_pos:
-                current_time = min(cur_time1, cur_time2)
-                return current_time, round(current_pos, 3)
-    return None, None
-
-'''
-progressive wing variable entry iron condor
-'''
-def pw_veic(monitor_time, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult):
-    trade_stats = TradeStats()
+'''
+stop_loss for many stop loss multipliers from one pass over the combined series,
+stop times and prices with -1 / nan for multipliers that never stop out
+'''
+def stop_loss_curve(date, lower_strike, upper_strike, timestamp, entry_credit, stop_multipliers, option_type, resolution=None):
+    # combined position of both legs
+    series = chain_cache.day(date, resolution).spread(lower_strike, upper_strike, option_type)
+
+    # never stopped if no data
+    if series is None:
+        return np.full(len(stop_multipliers), -1, dtype=np.int32), np.full(len(stop_multipliers), np.nan, dtype=np.float32)
+    timings.count("ticks_scanned", len(series))
     
-    for zip_file in sorted(os.listdir(f"{BASE_PATH}")):
-        # extract date
-        date = zip_file.replace(".zip", "")
+    # levels computed one by one like stop_loss so they compare equal
+    return stop_loss_fills(series, timestamp, [entry_credit * stop_multiplier for stop_multiplier in stop_multipliers])
+
+'''
+filled trades of a single day, days are independent of each other
+'''
+class DayResult:
+    def __init__(self, date, trades):
+        self.date = date
+        self.trades = trades
+
+'''
+runs one day of the strategy for each monitor time, one result per time
+'''
+def pw_veic_day_times(date, monitor_times, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, resolution=None):
+    return next(pw_veic_batch({date: monitor_times}, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, resolution))
+
+'''
+day results of many days (date -> monitor times), one list per day in the given order
+spreads of every (day, time) are discovered in one batch, then each day is simulated as it is
+consumed and every time reuses the day's combined leg series
+batches stay within the chain cache so discovered days are still decoded when simulated,
+a batch size of 1 yields each day as soon as it is done
+'''
+def pw_veic_batch(days, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, resolution=None, batch_size=None):
+    dates = list(days)
+    batch_size = min(batch_size or chain_cache.max_days, chain_cache.max_days)
+    for batch_start in range(0, len(dates), batch_size):
+        batch = dates[batch_start:batch_start + batch_size]
         
-        # load bounds
-        lower_bound = int(search_bounds[date]["lower"])
-        upper_bound = int(search_bounds[date]["upper"])
+        # load bounds around the at the money strike at each entry
+        upper_rows, lower_rows = [], []
+        for date in batch:
+            chain = chain_cache.day(date, resolution)
+            for monitor_time in days[date]:
+                atm_strike = chain.atm_strike(monitor_time)
+                upper_rows.append((date, monitor_time, int(atm_strike + BUFFER) if atm_strike is not None else None))
+                lower_rows.append((date, monitor_time, int(atm_strike - BUFFER) if atm_strike is not None else None))
         
         # build spreads
-        call_spreads = find_bearish_call_spreads(date, monitor_time, monitor_credit, spread_width, num_spreads, upper_bound)
-        put_spreads = find_bullish_put_spreads(date, monitor_time, monitor_credit, spread_width, num_spreads, lower_bound)
-
-        # ensure number of call and put spreads are equal
-        min_length = min(len(call_spreads), len(put_spreads))
-        call_spreads = call_spreads[:min_length]
-        put_spreads = put_spreads[:min_length]
-        spreads = call_spreads + put_spreads
-        
-        # process spreads
-        daily_profit, daily_loss = 0, 0
-        for i, spread in enumerate(spreads):
-            is_call = i < len(call_spreads)
-            
-            entry_time, entry_credit = stop_limit_order(date, int(spread.short_strike), int(spread.long_strike), monitor_time, stop_price, limit_price, 'call' if is_call else 'put')
+        call_spreads = iter(find_spreads_batch(upper_rows, monitor_credit, spread_width, num_spreads, 'call', resolution))
+        put_spreads = iter(find_spreads_batch(lower_rows, monitor_credit, spread_width, num_spreads, 'put', resolution))
+        
+        for date in batch:
+            yield [simulate_spreads(date, monitor_time, next(call_spreads), next(put_spreads), stop_price, limit_price, sl_mult, resolution) for monitor_time in days[date]]
+
+'''
+entry and stop loss of the day's spreads opened at one monitor time
+'''
+@timed("simulate")
+def simulate_spreads(date, monitor_time, call_spreads, put_spreads, stop_price, limit_price, sl_mult, resolution=None):
+    trades = []
+    
+    # ensure number of call and put spreads are equal
+    min_length = min(len(call_spreads), len(put_spreads))
+    call_spreads = call_spreads[:min_length]
+    put_spreads = put_spreads[:min_length]
+    spreads = call_spreads + put_spreads
+    
+    # process spreads
+    for i, spread in enumerate(spreads):
+        is_call = i < len(call_spreads)
+        
+        entry_time, entry_credit = stop_limit_order(date, int(spread.short_strike), int(spread.long_strike), monitor_time, stop_price, limit_price, 'call' if is_call else 'put', resolution)
+        
+        if entry_time is not None:
+            sl_et, sl_ec = stop_loss(date, int(spread.short_strike), int(spread.long_strike), entry_time, entry_credit, sl_mult, 'call' if is_call else 'put', resolution)
             
-            if entry_time is not None:
-                sl_et, sl_ec = stop_loss(date, int(spread.short_strike), int(spread.long_strike), entry_time, entry_credit, sl_mult, 'call' if is_call else 'put')
-                trade_stats.total_trades += 1
-
-                profit = 0
-                if sl_ec is not None:
-                    # loss
-                    profit = entry_credit - sl_ec
-                    trade_stats.total_profit += profit * 100
-
-                    trade_stats.lose_count += 1
-                    daily_loss += profit * 100
-                else:
-                    # win
-                    profit = entry_credit
-                    trade_stats.total_profit += profit * 100
-                    
-                    trade_stats.win_count += 1
-                    daily_profit += profit * 100
-                    
-                # update spread stats
-                trade_stats.update_spread_stats(str(date), 'Call' if is_call else 'Put', f"{spread.short_strike} / {spread.long_strike}", str(spread.credit), str(entry_time), str(entry_credit), str(sl_et) if sl_et is not None else "None", str(sl_ec) if sl_ec is not None else "None", profit * 100)
+            # loss or win
+            profit = entry_credit - sl_ec if sl_ec is not None else entry_credit
+            trades.append((is_call, spread.short_strike, spread.long_strike, spread.credit, entry_time, entry_credit, sl_et if sl_et is not None else -1, sl_ec if sl_ec is not None else np.nan, profit))
+    return DayResult(date, np.array(trades, dtype=TRADE_DTYPE))
+
+'''
+one worker pool kept alive between requests so workers keep their decoded chains,
+a request asking for another size replaces it
+'''
+worker_pool = None
+worker_pool_size = 0
+worker_pool_lock = threading.Lock()
+
+def get_worker_pool(workers):
+    global worker_pool, worker_pool_size
+    workers = min(workers, os.cpu_count())
+    with worker_pool_lock:
+        if worker_pool is None or worker_pool_size != workers:
+            # work already submitted to the old pool still finishes
+            if worker_pool is not None:
+                worker_pool.shutdown(wait=False)
+            worker_pool = ProcessPoolExecutor(max_workers=workers)
+            worker_pool_size = workers
+        return worker_pool
+
+'''
+pw_veic_day_times in a worker process, timings recorded there travel back with the results
+'''
+def pw_veic_day_worker(record_timings, date, monitor_times, *params):
+    timings.reset(record_timings)
+    chain_cache.validate([date])
+    day_results = pw_veic_day_times(date, monitor_times, *params)
+    return day_results, timings.snapshot() if record_timings else None
+
+'''
+day results in date order, memoized days are yielded without recomputing
+'''
+def pw_veic_days(monitor_time, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers=WORKERS, resolution=None, dates=None, batch_size=None):
+    for day_results in pw_veic_days_times([monitor_time], spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers, resolution, dates, batch_size):
+        yield day_results[0]
+
+'''
+per date, the day results of every monitor time in the given order
+memoized (day, time) pairs are reused, the rest of a day is computed in one pass
+'''
+def pw_veic_days_times(monitor_times, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers=WORKERS, resolution=None, dates=None, batch_size=None):
+    # extract dates, every day on disk unless a selection was given
+    dates = chain_cache.dates() if dates is None else dates
+    params = (spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult)
+    
+    # reopen days whose file changed, so results never come from a stale chain
+    chain_cache.validate(dates)
+    
+    # default resolution keeps the keys memoized before resolutions existed
+    memo_params = [*params] if resolution is None else [*params, resolution]
+    
+    # reuse memoized days, keyed by parameters and that day's files
+    day_results, memo_keys = {}, {}
+    if DAY_MEMO:
+        with timings.span("day_memo"):
+            fingerprints = day_fingerprints(BASE_PATH)
+            for date in dates:
+                for monitor_time in monitor_times:
+                    memo_keys[date, monitor_time] = day_memo.key([DAY_MEMO_VERSION, MAX_RANGE, BUFFER, monitor_time, *memo_params], fingerprints[date])
+                    trades = day_memo.get(memo_keys[date, monitor_time])
+                    if trades is not None:
+                        day_results[date, monitor_time] = DayResult(date, trades)
+    
+    # times still to run on each day
+    missing = {}
+    for date in dates:
+        times = [monitor_time for monitor_time in monitor_times if (date, monitor_time) not in day_results]
+        if times:
+            missing[date] = times
+    
+    # fan days out across processes, results come back in date order
+    params = (*params, resolution)
+    if workers > 1 and len(missing) > 1:
+        computed = get_worker_pool(workers).map(pw_veic_day_worker, repeat(timings.enabled), list(missing), list(missing.values()), *[repeat(param) for param in params])
+    else:
+        computed = ((day_results, None) for day_results in pw_veic_batch(missing, *params, batch_size))
+    computed = iter(computed)
+    
+    for date in dates:
+        if date in missing:
+            computed_results, worker_timings = next(computed)
+            if worker_timings is not None:
+                timings.merge(worker_timings)
+            for monitor_time, day_result in zip(missing[date], computed_results):
+                if DAY_MEMO:
+                    day_memo.put(memo_keys[date, monitor_time], day_result.trades)
+                day_results[date, monitor_time] = day_result
+        yield [day_results.pop((date, monitor_time)) for monitor_time in monitor_times]
+
+'''
+progressive wing variable entry iron condor, a list of monitor times gives stats per time
+'''
+def pw_veic(monitor_time, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers=WORKERS, resolution=None, dates=None):
+    if isinstance(monitor_time, list):
+        return pw_veic_times(monitor_time, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers, resolution, dates)
+    return pw_veic_times([monitor_time], spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers, resolution, dates)[monitor_time]
+
+'''
+monitor time -> trade stats, every time evaluated against one decode of each day
+'''
+def pw_veic_times(monitor_times, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers=WORKERS, resolution=None, dates=None):
+    monitor_times = list(dict.fromkeys(monitor_times))
+    trade_stats = {monitor_time: TradeStats() for monitor_time in monitor_times}
+    for day_results in pw_veic_days_times(monitor_times, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers, resolution, dates):
+        for monitor_time, day_result in zip(monitor_times, day_results):
+            trade_stats[monitor_time].add_day(day_result)
+    for stats in trade_stats.values():
+        stats.update_final_stats()
+    return trade_stats
+
+'''
+one record per day as soon as it is done, then a summary record
+'''
+def pw_veic_stream(monitor_time, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers=WORKERS, resolution=None, dates=None):
+    trade_stats = TradeStats()
+    profit = 0.0
+    
+    # spreads are discovered one day at a time so the first record is not held back by later days
+    for day_result in pw_veic_days(monitor_time, spread_width, monitor_credit, num_spreads, stop_price, limit_price, sl_mult, workers, resolution, dates, batch_size=1):
+        trade_stats.add_day(day_result)
         
-        # update stats
-        trade_stats.update_daily_stats(daily_loss, daily_profit, date)
+        # running totals for this day only, continuing from the previous day
+        daily_profits, daily_losses, profit_over_time = daily_totals(day_result.trades, np.zeros(len(day_result.trades), dtype=int), 1, profit)
+        profit = profit_over_time[0]
+        yield {
+            "date": str(day_result.date),
+            "dailyProfit": round(daily_profits[0], 2),
+            "dailyLoss": round(daily_losses[0], 2),
+            "profitOverTime": round(profit, 2),
+            "spreadData": build_spread_rows(np.full(len(day_result.trades), int(day_result.date)), day_result.trades)
+        }
     trade_stats.update_final_stats()
-    return trade_stats
+    yield {
+        "summary": {
+            "totalProfit": trade_stats.total_profit,
+            "totalTrades": trade_stats.total_trades,
+            "winCount": trade_stats.win_count,
+            "loseCount": trade_stats.lose_count,
+            "winRate": trade_stats.win_rate,
+            "maxDailyWin": trade_stats.max_daily_win,
+            "maxDailyLoss": trade_stats.max_daily_loss
+        }
+    }
+
+'''
+pw_veic over every parameter combination, decoded chains and spread series are reused
+a list of monitor times gives the results per time
+'''
+def pw_veic_sweep(monitor_time, num_spreads, grid, workers=WORKERS, resolution=None, dates=None):
+    monitor_times = monitor_time if isinstance(monitor_time, list) else [monitor_time]
+    sweep_results = {time: [] for time in monitor_times}
+    for params in grid:
+        trade_stats = pw_veic_times(monitor_times, int(params["spreadWidth"]), float(params["entryCredit"]), num_spreads, float(params["stopPrice"]), float(params["limitPrice"]), float(params["stopLossMultiplier"]), workers, resolution, dates)
+        for time, stats in trade_stats.items():
+            sweep_results[time].append({
+                **params,
+                "totalProfit": stats.total_profit,
+                "totalTrades": stats.total_trades,
+                "winCount": stats.win_count,
+                "loseCount": stats.lose_count,
+                "winRate": stats.win_rate,
+                "maxDailyWin": stats.max_daily_win,
+                "maxDailyLoss": stats.max_daily_loss
+            })
+    return sweep_results if isinstance(monitor_time, list) else sweep_results[monitor_time]
+
+'''
+walk forward optimization: the grid is run once over every day, each rolling in sample window picks
+the combination with the best profit and the next out of sample window trades it
+returns the stitched out of sample trade stats and the windows, per time for a list of monitor times
+'''
+def pw_veic_walk_forward(monitor_time, num_spreads, grid, in_sample, out_of_sample, workers=WORKERS, resolution=None, dates=None):
+    monitor_times = monitor_time if isinstance(monitor_time, list) else [monitor_time]
+    monitor_times = list(dict.fromkeys(monitor_times))
+    dates = chain_cache.dates() if dates is None else dates
+    windows = walk_forward_windows(len(dates), in_sample, out_of_sample)
+    
+    # per (combination, time, day) results and a combination x day p&l matrix per time, shared by every window
+    day_results = [[[] for _ in monitor_times] for _ in grid]
+    day_pnl = {time: np.zeros((len(grid), len(dates))) for time in monitor_times}
+    for row, params in enumerate(grid):
+        for day, results in enumerate(pw_veic_days_times(monitor_times, int(params["spreadWidth"]), float(params["entryCredit"]), num_spreads, float(params["stopPrice"]), float(params["limitPrice"]), float(params["stopLossMultiplier"]), workers, resolution, dates)):
+            for index, (time, day_result) in enumerate(zip(monitor_times, results)):
+                day_results[row][index].append(day_result)
+                day_pnl[time][row, day] = (day_result.trades['profit'].astype(np.float64) * 100).sum()
+    
+    walk_forward = {}
+    for index, time in enumerate(monitor_times):
+        best, in_sample_profits = walk_forward_select(day_pnl[time], windows)
+        
+        # out of sample days of each window traded with that window's winner
+        trade_stats = TradeStats()
+        for (start, stop, oos_stop), row in zip(windows, best):
+            for day in range(stop, oos_stop):
+                trade_stats.add_day(day_results[row][index][day])
+        trade_stats.update_final_stats()
+        
+        walk_forward[time] = (trade_stats, [
+            {
+                "inSample": {"startDate": str(dates[start]), "endDate": str(dates[stop - 1])},
+                "outOfSample": {"startDate": str(dates[stop]), "endDate": str(dates[oos_stop - 1])},
+                "params": grid[row],
+                "inSampleProfit": round(float(profit), 2)
+            }
+            for (start, stop, oos_stop), row, profit in zip(windows, best.tolist(), in_sample_profits)
+        ])
+    return walk_forward if isinstance(monitor_time, list) else walk_forward[monitor_time]
+
+'''
+trade stats of a backtest under every stop loss multiplier, entries do not depend on the
+multiplier so only the stop outs of the filled trades are redone, one pass per trade
+'''
+@timed("stop_loss_curve")
+def pw_veic_stop_loss_curve(trade_stats, stop_multipliers, resolution=None):
+    if len(stop_multipliers) > MAX_SWEEP_SIZE:
+        raise ValueError(f"stop loss curve has {len(stop_multipliers)} multipliers, limit is {MAX_SWEEP_SIZE}")
+    trades = trade_stats.trades
+    stop_times = np.full((len(trades), len(stop_multipliers)), -1, dtype=np.int32)
+    stop_prices = np.full((len(trades), len(stop_multipliers)), np.nan, dtype=np.float32)
+    for i, (date, trade) in enumerate(zip(trade_stats.trade_dates.tolist(), trades)):
+        stop_times[i], stop_prices[i] = stop_loss_curve(str(date), int(trade['short_strike']), int(trade['long_strike']), trade['entry_time'], trade['entry_credit'], stop_multipliers, 'call' if trade['call'] else 'put', resolution)
+    
+    # day boundaries of the ledger
+    splits = np.cumsum([len(day_trades) for day_trades in trade_stats.day_trades])[:-1]
+    
+    curve = []
+    for column, stop_multiplier in enumerate(stop_multipliers):
+        # same ledger with this multiplier's stop outs
+        curve_trades = trades.copy()
+        stopped = stop_times[:, column] >= 0
+        curve_trades['stop_time'] = stop_times[:, column]
+        curve_trades['stop_price'] = stop_prices[:, column]
+        curve_trades['profit'] = np.where(stopped, trades['entry_credit'] - stop_prices[:, column], trades['entry_credit'])
+        
+        stats = TradeStats()
+        for date, day_trades in zip(trade_stats.day_dates, np.split(curve_trades, splits)):
+            stats.add_day(DayResult(date, day_trades))
+        stats.update_final_stats()
+        curve.append({
+            "stopLossMultiplier": stop_multiplier,
+            "totalProfit": stats.total_profit,
+            "totalTrades": stats.total_trades,
+            "winCount": stats.win_count,
+            "loseCount": stats.lose_count,
+            "winRate": stats.win_rate,
+            "maxDailyWin": stats.max_daily_win,
+            "maxDailyLoss": stats.max_daily_loss,
+            "maxDrawdown": stats.max_drawdown
+        })
+    return curve
+
+'''
+response body for a single backtest
+'''
+def build_response(trade_stats):
+    return {
+        "totalProfit": trade_stats.total_profit,
+        "dates": trade_stats.dates,
+        "profitOverTime": trade_stats.profit_over_time,
+        "totalTrades": trade_stats.total_trades,
+        "winCount": trade_stats.win_count,
+        "loseCount": trade_stats.lose_count,
+        "winRate": trade_stats.win_rate,
+        "maxDailyWin": trade_stats.max_daily_win,
+        "maxDailyLoss": trade_stats.max_daily_loss,
+        "dailyLosses": trade_stats.daily_losses,
+        "dailyProfits": trade_stats.daily_profits,
+        "maxDrawdown": trade_stats.max_drawdown,
+        "spreadData": build_spread_rows(trade_stats.trade_dates, trade_stats.trades)
+    }
+
+'''
+bootstrap block of a backtest, the request sends "bootstrap": true or {samples, confidence, ruinLevel, seed}
+'''
+@timed("bootstrap")
+def build_bootstrap(trade_stats, options):
+    options = options if isinstance(options, dict) else {}
+    return bootstrap(
+        trade_stats.daily_pnl,
+        trade_stats.trades['stop_time'] < 0,
+        options.get("samples", BOOTSTRAP_SAMPLES),
+        float(options.get("confidence", BOOTSTRAP_CONFIDENCE)),
+        float(options.get("ruinLevel", BOOTSTRAP_RUIN_LEVEL)),
+        options.get("seed", 0)
+    )
+
+'''
+spread rows for the response, raw ledger values are formatted only here
+'''
+@timed("serialize")
+def build_spread_rows(trade_dates, trades):
+    # format each date once
+    date_labels = {date: datetime.strptime(str(date), "%Y%m%d").strftime("%b %d, %Y") for date in np.unique(trade_dates).tolist()}
+    
+    def clock(timestamp):
+        timestamp = str(timestamp)
+        return f"{timestamp[0:2]}:{timestamp[2:4]}"
+    
+    return [
+        {
+            "spreadDate": date_labels[date],
+            "spreadType": 'Call' if is_call else 'Put',
+            "spreadSpread": f"{short_strike} / {long_strike}",
+            "spreadCreditAtOpen": str(credit),
+            "spreadExecutionTime": clock(entry_time),
+            "spreadExecutionCredit": str(entry_credit),
+            "spreadStopOutTime": clock(stop_time) if stop_time >= 0 else "None",
+            "spreadStopOutPrice": str(stop_price) if stop_time >= 0 else "None",
+            "spreadProfit": profit
+        }
+        
+        # float32 columns are iterated as numpy scalars so they print as before
+        for date, is_call, short_strike, long_strike, credit, entry_time, entry_credit, stop_time, stop_price, profit in zip(
+            trade_dates.tolist(),
+            trades['call'].tolist(),
+            trades['short_strike'].tolist(),
+            trades['long_strike'].tolist(),
+            trades['credit'],
+            trades['entry_time'].tolist(),
+            trades['entry_credit'],
+            trades['stop_time'].tolist(),
+            trades['stop_price'],
+            np.round(trades['profit'].astype(np.float64) * 100, 2).tolist()
+        )
+    ]
+
+'''
+writes records as newline delimited json, streamed when the runtime supports it
+'''
+def send_ndjson(context, records):
+    headers = {"content-type": "application/x-ndjson"}
+    if hasattr(context.res, "start"):
+        context.res.start(200, headers)
+        for record in records:
+            context.res.writeText(json.dumps(record) + "\n")
+        return context.res.end()
+    return context.res.text("".join(json.dumps(record) + "\n" for record in records), 200, headers)
 
 def main(context):
     try:
@@ -460,60 +728,110 @@ def main(context):
         stop_price = data.get("stopPrice")
         limit_price = data.get("limitPrice")
         stop_loss_multiplier = data.get("stopLossMultiplier")
+        workers = min(max(int(data.get("workers", WORKERS)) or os.cpu_count(), 1), os.cpu_count())
+        
+        # stored tick resolution to simulate on, none is the default level
+        resolution = int(data["resolution"]) if data.get("resolution") is not None else None
+        
+        # only the selected days are ever opened, none runs every day on disk
+        dates = None
+        if any(data.get(field) is not None for field in DATE_FIELDS):
+            dates = select_dates(chain_cache.dates(), data.get("startDate"), data.get("endDate"), data.get("days"), data.get("weekdays"))
+            print(f"\nselected {len(dates)} days")
+        
+        # spans and counters for this request only
+        timings.reset(bool(data.get("timings", TIMINGS)))
 
         # log extracted values
         print(f"\nentryTime: {entry_time}, spreadWidth: {spread_width}, entryCredit: {entry_credit}")
         print(f"numberOfSpreads: {number_of_spreads}, stopPrice: {stop_price}, limitPrice: {limit_price}, stopLossMultiplier: {stop_loss_multiplier}")
         
-        # reformat entry time, 9:30 AM -> 93000000
-        entry_time = entry_time.replace(":", "")
-        entry_time = entry_time + "00000"
+        # reformat entry time, 9:30 AM -> 93000000, a list of times runs in one pass
+        entry_times = entry_time if isinstance(entry_time, list) else [entry_time]
+        monitor_times = {label: int(label.replace(":", "") + "00000") for label in entry_times}
+        monitor_time = list(monitor_times.values()) if isinstance(entry_time, list) else monitor_times[entry_time]
         
-        # call veic
-        trade_stats = pw_veic(int(entry_time), int(spread_width), float(entry_credit), int(number_of_spreads), float(stop_price), float(limit_price), float(stop_loss_multiplier))
-        print(trade_stats)
+        # stream day by day
+        if data.get("stream") and not is_sweep(data) and not data.get("walkForward"):
+            if isinstance(entry_time, list):
+                raise ValueError("stream takes a single entryTime")
+            sent = send_ndjson(context, pw_veic_stream(monitor_time, int(spread_width), float(entry_credit), int(number_of_spreads), float(stop_price), float(limit_price), float(stop_loss_multiplier), workers, resolution, dates))
+            timings.log()
+            return sent
         
-        # return response
-        return context.res.json({
-            "response": {
-                "totalProfit": trade_stats.total_profit,
-                "dates": trade_stats.dates,
-                "profitOverTime": trade_stats.profit_over_time,
-                "totalTrades": trade_stats.total_trades,
-                "winCount": trade_stats.win_count,
-                "loseCount": trade_stats.lose_count,
-                "winRate": trade_stats.win_rate,
-                "maxDailyWin": trade_stats.max_daily_win,
-                "maxDailyLoss": trade_stats.max_daily_loss,
-                "dailyLosses": trade_stats.daily_losses,
-                "dailyProfits": trade_stats.daily_profits,
-                "spreadData": [
-                    {
-                        "spreadDate": a,
-                        "spreadType": b,
-                        "spreadSpread": c,
-                        "spreadCreditAtOpen": d,
-                        "spreadExecutionTime": e,
-                        "spreadExecutionCredit": f,
-                        "spreadStopOutTime": g,
-                        "spreadStopOutPrice": h,
-                        "spreadProfit": i
-                    }
+        # identical requests share a key, in the result cache and while in flight
+        params = {key: value for key, value in data.items() if key not in CACHE_IGNORED_FIELDS}
+        params["entryTime"] = monitor_time
+        cache_key = result_cache.key([RESULT_CACHE_VERSION, params], dataset_fingerprint(BASE_PATH))
+        
+        def run():
+            # serve identical requests from the result cache
+            with timings.span("result_cache"):
+                response = result_cache.get(cache_key) if RESULT_CACHE else None
+            if response is not None:
+                return response, True
+            
+            with timings.span("backtest"):
+                # walk forward over the sweep grid, {"inSample": days, "outOfSample": days}
+                if data.get("walkForward"):
+                    grid = expand_grid(data)
+                    print(f"\nwalk forward combinations: {len(grid)}")
+                    results = pw_veic_walk_forward(monitor_time, int(number_of_spreads), grid, data["walkForward"]["inSample"], data["walkForward"]["outOfSample"], workers, resolution, dates)
+                    build = lambda walk_forward: {**build_response(walk_forward[0]), "windows": walk_forward[1]}
+                
+                # parameter sweep
+                elif is_sweep(data):
+                    grid = expand_grid(data)
+                    print(f"\nsweep combinations: {len(grid)}")
+                    results = pw_veic_sweep(monitor_time, int(number_of_spreads), grid, workers, resolution, dates)
+                    build = lambda sweep_results: {"sweepResults": sweep_results}
+                else:
+                    # call veic
+                    results = pw_veic(monitor_time, int(spread_width), float(entry_credit), int(number_of_spreads), float(stop_price), float(limit_price), float(stop_loss_multiplier), workers, resolution, dates)
+                    print(results)
                     
-                    for a, b, c, d, e, f, g, h, i in zip(
-                        trade_stats.spread_date,
-                        trade_stats.spread_type,
-                        trade_stats.spread_spread,
-                        trade_stats.spread_credit_at_open,
-                        trade_stats.spread_execution_time,
-                        trade_stats.spread_execution_credit,
-                        trade_stats.spread_stop_out_time,
-                        trade_stats.spread_stop_out_price,
-                        trade_stats.spread_profit
-                    )
-                ]
-            }
-        })
+                    # stop loss multipliers to replay the filled trades with, list or {"start", "stop", "step"}
+                    if data.get("stopLossCurve") is not None:
+                        stop_multipliers = [float(value) for value in expand_values("stopLossCurve", data["stopLossCurve"])]
+                    
+                    # optional analyses next to each backtest
+                    def build(trade_stats):
+                        response = build_response(trade_stats)
+                        if data.get("bootstrap"):
+                            response["bootstrap"] = build_bootstrap(trade_stats, data["bootstrap"])
+                        if data.get("stopLossCurve") is not None:
+                            response["stopLossCurve"] = pw_veic_stop_loss_curve(trade_stats, stop_multipliers, resolution)
+                        return response
+                
+                # one response per entry time, cached by time since the key is, labels are put back per request
+                if isinstance(entry_time, list):
+                    response = {"entryTimes": {str(time): build(results[time]) for time in set(monitor_time)}}
+                else:
+                    response = build(results)
+            
+            if RESULT_CACHE:
+                result_cache.put(cache_key, response)
+            return response, False
+        
+        # concurrent identical requests wait for the first one instead of recomputing
+        (response, cache_hit), shared = single_flight.do(cache_key, run)
+        
+        # keyed as sent, 9:30 and 09:30 share a cached response
+        if isinstance(entry_time, list):
+            response = {"entryTimes": {label: response["entryTimes"][str(monitor_times[label])] for label in entry_times}}
+        
+        # return response
+        body = {
+            "meta": {
+                "preload": preload_stats,
+                "cache": {**result_cache.stats(cache_hit), "shared": shared}
+            },
+            "response": response
+        }
+        if timings.enabled:
+            timings.log()
+            body["timings"] = timings.summary()
+        return context.res.json(body)
     except Exception as e:
         print(f"error: {str(e)}")
         return context.res.json({"error": str(e)})
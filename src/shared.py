@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import fcntl
+import struct
+import hashlib
+import argparse
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from .chain import ChainCache, DayChain
+from .timing import timings
+
+SHARED_CHAINS = os.environ.get("SHARED_CHAINS", "0") == "1"
+SHARED_CHAINS_PREFIX = os.environ.get("SHARED_CHAINS_PREFIX", "pwveic")
+
+# posix shared memory segments show up as files here, attaching maps them read only
+SHM_PATH = "/dev/shm"
+
+# a data segment this old with no index and no publisher holding its lock was left by a crashed publisher
+ORPHAN_GRACE = 1.0
+
+'''
+segment name of a day and resolution, the source path is hashed into the day's part so other data
+directories on the box never match it, and the file's size and mtime into the version so changed data
+is published again
+'''
+def segment_name(prefix, path, date, resolution=None):
+    stat = os.stat(path)
+    path_digest = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:8]
+    return f"{prefix}_{path_digest}_{date}_{'d' if resolution is None else resolution}_{digest}"
+
+def segment_path(name):
+    return os.path.join(SHM_PATH, name)
+
+def remove_segment(name):
+    try:
+        os.remove(segment_path(name))
+    except OSError:
+        pass
+
+'''
+new segment that outlives this process, it is only removed by clear()
+'''
+def create_segment(name, size):
+    segment = shared_memory.SharedMemory(name=name, create=True, size=max(size, 8))
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+'''
+removes the other published versions of name's day and resolution from the same source path, they
+were made from a replaced or re-ingested file, processes still attached keep their mappings
+'''
+def remove_stale(name):
+    day_prefix = name.rsplit("_", 1)[0] + "_"
+    for file_name in os.listdir(SHM_PATH):
+        if file_name.startswith(day_prefix) and not file_name.startswith(f"{name}_"):
+            remove_segment(file_name)
+
+'''
+true if name's data segment has no index and no live publisher, the publisher holds a lock
+on it until the index is written and the lock goes away with the process
+'''
+def is_orphan(name):
+    try:
+        with open(segment_path(f"{name}_d"), 'rb') as f:
+            # just created, the publisher may not hold the lock yet
+            if time.time() - os.fstat(f.fileno()).st_mtime < ORPHAN_GRACE:
+                return False
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    # locked by a publisher, or gone
+    except OSError:
+        return False
+    return not os.path.exists(segment_path(f"{name}_i"))
+
+'''
+decodes every series of a day into one time and one mid column in a data segment,
+then writes the name index and metadata to an index segment, readers only look for the index
+so they never see a half written day
+'''
+def publish_day(chain, name):
+    chain.preload()
+    names = sorted(chain.series)
+    lengths = [len(chain.series[series_name]['time']) for series_name in names]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(int) if names else []
+    count = int(sum(lengths))
+    mid_offset = (4 * count + 7) // 8 * 8
+
+    with timings.span("shared_publish"):
+        data = create_segment(f"{name}_d", mid_offset + 4 * count)
+        lock = open(segment_path(f"{name}_d"), 'rb')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            times = np.ndarray(count, dtype='<i4', buffer=data.buf)
+            mids = np.ndarray(count, dtype='<f4', buffer=data.buf, offset=mid_offset)
+            for series_name, start, length in zip(names, starts, lengths):
+                times[start:start + length] = chain.series[series_name]['time']
+                mids[start:start + length] = chain.series[series_name]['mid']
+            del times, mids
+            data.close()
+
+            header = {
+                "date": chain.date,
+                "count": count,
+                "midOffset": mid_offset,
+                "series": {series_name: [int(start), int(length)] for series_name, start, length in zip(names, starts, lengths)},
+                "meta": chain.metadata()
+            }
+            encoded = json.dumps(header).encode()
+            index = create_segment(f"{name}_i", 8 + len(encoded))
+            index.buf[:8] = struct.pack('<Q', len(encoded))
+            index.buf[8:8 + len(encoded)] = encoded
+            index.close()
+        # leave no data segment without an index behind
+        except BaseException:
+            remove_segment(f"{name}_d")
+            raise
+        finally:
+            lock.close()
+    timings.count("bytes_published", 8 * count)
+    remove_stale(name)
+
+'''
+one day attached from shared memory, series are read only views of the published columns
+'''
+class SharedDayChain(DayChain):
+    def __init__(self, name, date):
+        self.date = date
+        self.series = {}
+        self.spreads = {}
+        self.strike_index = {}
+
+        # a missing index means the day is not published (yet)
+        with timings.span("chain_open"):
+            with open(os.path.join(SHM_PATH, f"{name}_i"), 'rb') as f:
+                header_length, = struct.unpack('<Q', f.read(8))
+                header = json.loads(f.read(header_length))
+            self.buffer = np.memmap(os.path.join(SHM_PATH, f"{name}_d"), dtype=np.uint8, mode='r')
+        timings.count("segments_attached")
+        self.index = header["series"]
+        self.meta = header["meta"]
+        self.source = self.meta.get("source")
+        self.times = self.buffer[:4 * header["count"]].view('<i4')
+        self.mids = self.buffer[header["midOffset"]:header["midOffset"] + 4 * header["count"]].view('<f4')
+
+    def location(self, name):
+        return None
+
+    def read(self, name):
+        location = self.index.get(name)
+        if location is None:
+            return None
+        start, length = location
+        return {'time': self.times[start:start + length], 'mid': self.mids[start:start + length]}
+
+'''
+chain cache whose days live in shared memory, the first process to open a day publishes it
+and every other process on the box maps the same pages instead of decoding its own copy
+'''
+class SharedChainCache(ChainCache):
+    def __init__(self, base_path, prefix=SHARED_CHAINS_PREFIX, **kwargs):
+        super().__init__(base_path, **kwargs)
+        self.prefix = prefix
+
+    def open_day(self, date, resolution=None):
+        if not os.path.isdir(SHM_PATH):
+            return super().open_day(date, resolution)
+
+        name = segment_name(self.prefix, self.day_path(date), date, resolution)
+        try:
+            return SharedDayChain(name, date)
+        except FileNotFoundError:
+            pass
+
+        chain = super().open_day(date, resolution)
+        try:
+            publish_day(chain, name)
+        except FileExistsError:
+            # another process is publishing this day, use the private copy meanwhile
+            if not is_orphan(name):
+                return chain
+            
+            # a crashed publisher's data segment, take it over once
+            remove_segment(f"{name}_d")
+            try:
+                publish_day(chain, name)
+            except OSError:
+                return chain
+        # shared memory unavailable, this process keeps its own copy
+        except OSError as e:
+            print(f"shared publish failed: {str(e)}")
+            return chain
+        return SharedDayChain(name, date)
+
+'''
+removes every published segment with the prefix, attached processes keep their mappings
+'''
+def clear(prefix=SHARED_CHAINS_PREFIX):
+    removed = 0
+    for file_name in os.listdir(SHM_PATH):
+        if file_name.startswith(f"{prefix}_"):
+            try:
+                os.remove(os.path.join(SHM_PATH, file_name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+'''
+usage: python -m src.shared publish [data_path] [date ...] [--resolution N] [--prefix pwveic]
+       python -m src.shared clear [--prefix pwveic]
+publish decodes the days into shared memory ahead of the workers, segments stay until cleared
+'''
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["publish", "clear"])
+    parser.add_argument("data_path", nargs="?", default="src/data/")
+    parser.add_argument("dates", nargs="*")
+    parser.add_argument("--resolution", type=int)
+    parser.add_argument("--prefix", default=SHARED_CHAINS_PREFIX)
+    args = parser.parse_args()
+
+    if args.command == "clear":
+        print(f"removed {clear(args.prefix)} segments")
+    else:
+        cache = SharedChainCache(args.data_path, args.prefix)
+        dates = args.dates or cache.dates()
+        total_bytes = 0
+        for date in dates:
+            total_bytes += cache.day(date, args.resolution).preload()
+            cache.clear()
+        print(f"published {len(dates)} days, {total_bytes / 1024 / 1024:.1f} MB")
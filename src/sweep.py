@@ -0,0 +1,44 @@
+import os
+import itertools
+import numpy as np
+
+SWEEP_FIELDS = ["spreadWidth", "entryCredit", "stopPrice", "limitPrice", "stopLossMultiplier"]
+MAX_SWEEP_SIZE = int(os.environ.get("MAX_SWEEP_SIZE", "1000"))
+
+'''
+true if any sweepable field carries a list or a range
+'''
+def is_sweep(data):
+    return any(isinstance(data.get(field), (list, dict)) for field in SWEEP_FIELDS)
+
+'''
+list -> values, {"start", "stop", "step"} -> inclusive range, scalar -> single value
+'''
+def expand_values(field, value):
+    if isinstance(value, list):
+        values = value
+    elif isinstance(value, dict):
+        start, stop, step = float(value["start"]), float(value["stop"]), float(value.get("step", 1))
+        if step <= 0:
+            raise ValueError(f"{field} step must be positive")
+
+        # inclusive of stop, rounded to hide float drift
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        values = [round(start + step * i, 10) for i in range(max(count, 0))]
+    else:
+        values = [value]
+
+    if len(values) == 0:
+        raise ValueError(f"{field} has no values to sweep")
+    return values
+
+'''
+cartesian product of every sweep field, one dict per combination
+'''
+def expand_grid(data):
+    values = [expand_values(field, data.get(field)) for field in SWEEP_FIELDS]
+
+    size = int(np.prod([len(v) for v in values]))
+    if size > MAX_SWEEP_SIZE:
+        raise ValueError(f"sweep has {size} combinations, limit is {MAX_SWEEP_SIZE}")
+    return [dict(zip(SWEEP_FIELDS, combination)) for combination in itertools.product(*values)]
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+TIMINGS = os.environ.get("TIMINGS", "0") == "1"
+
+# shared no-op span, disabled timing allocates nothing
+NULL_SPAN = nullcontext()
+
+'''
+wall time of one named block, added to the recorder on exit
+'''
+class Span:
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, time.perf_counter() - self.start)
+        return False
+
+'''
+spans and counters of one request, spans include time of spans nested in them
+'''
+class Timings:
+    def __init__(self, enabled=TIMINGS):
+        self.reset(enabled)
+
+    def reset(self, enabled):
+        self.enabled = enabled
+        self.spans = {}
+        self.counters = {}
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def add(self, name, seconds, calls=1):
+        total_calls, total_seconds = self.spans.get(name, (0, 0.0))
+        self.spans[name] = (total_calls + calls, total_seconds + seconds)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    '''
+    raw totals, picklable so worker processes can hand them back
+    '''
+    def snapshot(self):
+        return {"spans": dict(self.spans), "counters": dict(self.counters)}
+
+    def merge(self, snapshot):
+        for name, (calls, seconds) in snapshot["spans"].items():
+            self.add(name, seconds, calls)
+        for name, amount in snapshot["counters"].items():
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        return {
+            "spans": {name: {"calls": calls, "seconds": round(seconds, 6)} for name, (calls, seconds) in sorted(self.spans.items())},
+            "counters": dict(sorted(self.counters.items()))
+        }
+
+    '''
+    one json log line per request so logs can be grepped and parsed
+    '''
+    def log(self):
+        if self.enabled:
+            print(f"timings {json.dumps(self.summary(), separators=(',', ':'))}")
+
+# recorder of the request being served, concurrent requests each set their own
+current_timings = ContextVar("timings", default=Timings())
+
+'''
+stands in for the current request's recorder, reset() gives the calling thread or task a new one
+'''
+class CurrentTimings:
+    def reset(self, enabled):
+        current_timings.set(Timings(enabled))
+
+    def __getattr__(self, name):
+        return getattr(current_timings.get(), name)
+
+timings = CurrentTimings()
+
+'''
+records every call of the function as a span when timing is on
+'''
+def timed(name):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = current_timings.get()
+            if not recorder.enabled:
+                return fn(*args, **kwargs)
+            with Span(recorder, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from src.analysis import walk_forward_select, walk_forward_windows
+
+def test_windows():
+    assert walk_forward_windows(10, 4, 2) == [(0, 4, 6), (2, 6, 8), (4, 8, 10)]
+    assert walk_forward_windows(5, 4, 3) == [(0, 4, 5)]
+
+def test_short_last_window():
+    windows = walk_forward_windows(9, 4, 2)
+    assert windows == [(0, 4, 6), (2, 6, 8), (4, 8, 9)]
+    # out of sample days are covered once each
+    assert [day for _, start, stop in windows for day in range(start, stop)] == list(range(4, 9))
+
+@pytest.mark.parametrize("num_days, in_sample, out_of_sample", [(4, 4, 1), (3, 4, 1), (10, 0, 1), (10, 4, 0)])
+def test_windows_rejects(num_days, in_sample, out_of_sample):
+    with pytest.raises(ValueError):
+        walk_forward_windows(num_days, in_sample, out_of_sample)
+
+def test_select_matches_sums():
+    rng = np.random.default_rng(0)
+    day_pnl = rng.normal(0, 100, (6, 30))
+    windows = walk_forward_windows(30, 7, 3)
+    best, profits = walk_forward_select(day_pnl, windows)
+    for window, (start, stop, _) in enumerate(windows):
+        sums = day_pnl[:, start:stop].sum(axis=1)
+        assert best[window] == np.argmax(sums)
+        assert profits[window] == pytest.approx(sums.max())
+
+def test_select_ties_go_to_earlier_row():
+    day_pnl = [
+        [0, 0, 5, 5],
+        [5, -5, 5, 5],
+        [0, 0, 5, 5],
+        [-1, 1, 0, 0]
+    ]
+    best, profits = walk_forward_select(day_pnl, [(0, 2, 3), (1, 3, 4), (2, 4, 4)])
+    assert best.tolist() == [0, 0, 0]
+    assert profits.tolist() == [0, 5, 10]
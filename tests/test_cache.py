@@ -0,0 +1,102 @@
+import time
+import threading
+import pytest
+from src.cache import SingleFlight
+
+'''
+calls the flight from n threads, results and errors by thread
+'''
+def run_threads(single_flight, key, fn, n):
+    results = [None] * n
+    errors = [None] * n
+    def call(i):
+        try:
+            results[i] = single_flight.do(key, fn)
+        except Exception as e:
+            errors[i] = e
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+def wait_until(check, timeout=5.0):
+    deadline = time.time() + timeout
+    while not check():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+'''
+fn that blocks until released, so every follower arrives while the leader runs
+'''
+def blocking(calls, release, result=None, error=None):
+    def fn():
+        calls.append(1)
+        release.wait(5.0)
+        if error is not None:
+            raise error
+        return result
+    return fn
+
+def test_followers_share_the_leaders_result():
+    single_flight = SingleFlight()
+    calls, release = [], threading.Event()
+    response = {"profit": 1}
+    threads, results, errors = run_threads(single_flight, "key", blocking(calls, release, response), 8)
+    wait_until(lambda: single_flight.shared == 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert errors == [None] * 8
+    assert all(result[0] is response for result in results)
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+
+def test_leader_error_reaches_followers():
+    single_flight = SingleFlight()
+    calls, release = [], threading.Event()
+    error = ValueError("leader failed")
+    threads, results, errors = run_threads(single_flight, "key", blocking(calls, release, error=error), 4)
+    wait_until(lambda: single_flight.shared == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [None] * 4
+    assert all(e is error for e in errors)
+
+def test_follower_wait_is_bounded():
+    single_flight = SingleFlight(timeout=0.05)
+    calls, release = [], threading.Event()
+    threads, results, errors = run_threads(single_flight, "key", blocking(calls, release, 1), 1)
+    wait_until(lambda: len(calls) == 1)
+
+    with pytest.raises(TimeoutError):
+        single_flight.do("key", lambda: 2)
+    release.set()
+    threads[0].join()
+    assert results[0] == (1, False)
+
+def test_finished_flight_is_forgotten():
+    single_flight = SingleFlight()
+    calls = []
+    assert single_flight.do("key", lambda: calls.append(1) or len(calls)) == (1, False)
+    assert single_flight.do("key", lambda: calls.append(1) or len(calls)) == (2, False)
+    assert single_flight.flights == {}
+
+    def fail():
+        raise ValueError("failed")
+    with pytest.raises(ValueError):
+        single_flight.do("key", fail)
+    assert single_flight.do("key", lambda: 3) == (3, False)
+
+def test_different_keys_run_separately():
+    single_flight = SingleFlight()
+    calls, release = [], threading.Event()
+    threads, results, _ = run_threads(single_flight, "a", blocking(calls, release, "a"), 1)
+    wait_until(lambda: len(calls) == 1)
+    assert single_flight.do("b", lambda: "b") == ("b", False)
+    release.set()
+    threads[0].join()
+    assert results[0] == ("a", False)
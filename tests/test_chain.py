@@ -0,0 +1,32 @@
+import pytest
+from src.chain import select_dates
+
+# monday 2024-01-01 to sunday 2024-01-14
+CATALOG = [f"202401{day:02d}" for day in range(1, 15)]
+
+def test_range():
+    assert select_dates(CATALOG) == CATALOG
+    assert select_dates(CATALOG, "2024-01-03", "2024-01-05") == ["20240103", "20240104", "20240105"]
+    assert select_dates(CATALOG, start_date="20240113") == ["20240113", "20240114"]
+    assert select_dates(CATALOG, end_date="2024-01-02") == ["20240101", "20240102"]
+    # bounds that are not trading days
+    assert select_dates(["20240102", "20240105"], "2024-01-03", "2024-01-31") == ["20240105"]
+    assert select_dates(CATALOG, "2024-02-01") == []
+
+def test_day_list():
+    assert select_dates(CATALOG, days=["2024-01-09", "20240102", "2024-03-01"]) == ["20240102", "20240109"]
+    assert select_dates(CATALOG, "2024-01-05", days=["2024-01-02", "2024-01-09"]) == ["20240109"]
+    assert select_dates(CATALOG, days=[]) == []
+
+def test_weekday_names_and_numbers():
+    mondays = ["20240101", "20240108"]
+    assert select_dates(CATALOG, weekdays=["mon"]) == mondays
+    assert select_dates(CATALOG, weekdays=[" Monday "]) == mondays
+    assert select_dates(CATALOG, weekdays=[0]) == mondays
+    assert select_dates(CATALOG, weekdays=["fri", 0]) == ["20240101", "20240105", "20240108", "20240112"]
+    assert select_dates(CATALOG, "2024-01-02", "2024-01-10", weekdays=["Wed"]) == ["20240103", "20240110"]
+
+@pytest.mark.parametrize("weekday", ["funday", 7, -1, ""])
+def test_unknown_weekday(weekday):
+    with pytest.raises(ValueError):
+        select_dates(CATALOG, weekdays=[weekday])
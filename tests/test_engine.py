@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from src import engine
+from src.engine import build_spread_series, stop_limit_fill, stop_loss_fill, stop_loss_fills
+
+'''
+the two pointer walk stop_limit_order and stop_loss used before the engine was vectorized
+'''
+def loop_walk(times1, mids1, times2, mids2, timestamp, check):
+    if len(times1) == 0 or len(times2) == 0:
+        return None, None
+    cur_time1, cur_time2 = times1[0], times2[0]
+    cur_mid1, cur_mid2 = mids1[0], mids2[0]
+    index1 = 1 if len(times1) > 1 else len(times1)
+    index2 = 1 if len(times2) > 1 else len(times2)
+    while index1 < len(times1) or index2 < len(times2):
+        next_time1 = times1[index1] if index1 < len(times1) else float('inf')
+        next_time2 = times2[index2] if index2 < len(times2) else float('inf')
+        if next_time1 <= next_time2:
+            cur_time1, cur_mid1 = next_time1, mids1[index1]
+            index1 += 1
+        if next_time2 <= next_time1:
+            cur_time2, cur_mid2 = next_time2, mids2[index2]
+            index2 += 1
+        if cur_time1 > timestamp and cur_time2 > timestamp:
+            current_pos = cur_mid1 - cur_mid2
+            if check(current_pos):
+                return min(cur_time1, cur_time2), round(current_pos, 3)
+    return None, None
+
+def loop_stop_limit(times1, mids1, times2, mids2, entry_time, stop_price, limit_price):
+    state = {"triggered": False}
+    def check(current_pos):
+        if current_pos > stop_price:
+            state["triggered"] = True
+        return state["triggered"] and limit_price < current_pos < stop_price
+    return loop_walk(times1, mids1, times2, mids2, entry_time, check)
+
+def loop_stop_loss(times1, mids1, times2, mids2, timestamp, stop_level):
+    return loop_walk(times1, mids1, times2, mids2, timestamp, lambda current_pos: current_pos > stop_level)
+
+'''
+two sorted legs with repeated timestamps and some nan mids
+'''
+def random_legs(rng, min_ticks, max_ticks, max_time, step=0.05):
+    legs = []
+    for base in (1.0, 0.0):
+        n = int(rng.integers(min_ticks, max_ticks))
+        times = np.sort(rng.integers(0, max_time, n)).astype(np.int32)
+        mids = (base + np.cumsum(rng.normal(0, step, n))).astype(np.float32)
+        mids[rng.random(n) < 0.05] = np.nan
+        legs += [times, mids]
+    return legs
+
+def check_fills(legs, timestamp, stop_price, limit_price, stop_level):
+    series = build_spread_series(*legs)
+    expected = loop_stop_limit(*legs, timestamp, stop_price, limit_price)
+    actual = (None, None) if series is None else stop_limit_fill(series, timestamp, stop_price, limit_price)
+    assert repr(actual) == repr(expected)
+
+    expected = loop_stop_loss(*legs, timestamp, stop_level)
+    actual = (None, None) if series is None else stop_loss_fill(series, timestamp, stop_level)
+    assert repr(actual) == repr(expected)
+
+@pytest.mark.parametrize("coarse_to_fine_steps, coarse_block", [(4096, 64), (0, 4), (0, 64)])
+def test_fills_match_loop(monkeypatch, coarse_to_fine_steps, coarse_block):
+    monkeypatch.setattr(engine, "COARSE_TO_FINE_STEPS", coarse_to_fine_steps)
+    monkeypatch.setattr(engine, "COARSE_BLOCK", coarse_block)
+    rng = np.random.default_rng(0)
+    for _ in range(1500):
+        legs = random_legs(rng, 0, 40, 50)
+        timestamp = int(rng.integers(-1, 40))
+        stop_price = float(rng.choice([1.2, 1.1, 1.0, 0.9]))
+        check_fills(legs, timestamp, stop_price, stop_price - 0.15, float(rng.normal(1.1, 0.1)))
+
+def test_long_series_match_loop():
+    rng = np.random.default_rng(1)
+    for _ in range(5):
+        legs = random_legs(rng, engine.COARSE_TO_FINE_STEPS, 3 * engine.COARSE_TO_FINE_STEPS, 100000, step=0.005)
+        timestamp = int(rng.integers(0, 20000))
+        check_fills(legs, timestamp, 1.15, 1.05, float(rng.normal(1.2, 0.1)))
+
+def test_stop_loss_fills_match_single_level():
+    rng = np.random.default_rng(2)
+    for _ in range(500):
+        legs = random_legs(rng, 0, 60, 80)
+        series = build_spread_series(*legs)
+        if series is None:
+            continue
+        timestamp = int(rng.integers(-1, 60))
+        levels = [float(level) for level in rng.normal(1.0, 0.2, 5)]
+        times, prices = stop_loss_fills(series, timestamp, levels)
+        for level, stop_time, stop_price in zip(levels, times, prices):
+            expected = stop_loss_fill(series, timestamp, level)
+            actual = (None, None) if stop_time < 0 else (stop_time, stop_price)
+            assert repr(actual) == repr(expected)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from src.chain import ColumnarDayChain, write_columnar
+from src.ingest import thin_ticks
+
+'''
+the filtering loop of reduce_file_size, the script thin_ticks replaced
+'''
+def loop_thin(times, gap):
+    keep = [0]
+    last_time = times[0]
+    for i in range(1, len(times)):
+        if times[i] - last_time >= gap:
+            keep.append(i)
+            last_time = times[i]
+    return keep
+
+@pytest.mark.parametrize("gap", [1, 5, 60, 60000])
+def test_thin_ticks_matches_loop(gap):
+    rng = np.random.default_rng(gap)
+    for _ in range(300):
+        n = int(rng.integers(1, 200))
+        times = np.sort(rng.integers(0, max(gap, 1) * 20, n)).astype(np.int32)
+        assert thin_ticks(times, gap).tolist() == loop_thin(times, gap)
+
+def test_thin_ticks_unsorted_matches_loop():
+    rng = np.random.default_rng(3)
+    for _ in range(100):
+        times = rng.integers(0, 1000, int(rng.integers(2, 100))).astype(np.int32)
+        assert thin_ticks(times, 60).tolist() == loop_thin(times, 60)
+
+def test_thin_ticks_edges():
+    assert thin_ticks(np.zeros(0, dtype=np.int32), 60).tolist() == []
+    times = np.array([5, 5, 5, 70], dtype=np.int32)
+    assert thin_ticks(times, 0).tolist() == [0, 1, 2, 3]
+    assert thin_ticks(times, 60).tolist() == loop_thin(times, 60)
+
+def test_level_with_same_count_keeps_its_ticks(tmp_path):
+    times = np.array([93000000, 93450000, 93505000], dtype=np.int32)
+    mids = np.array([1.0, 2.0, 3.0], dtype=np.float32)
+    pyramid = {}
+    for level in (60000, 500000):
+        keep = thin_ticks(times, level)
+        pyramid[level] = {'C1': (times[keep], mids[keep])}
+    path = str(tmp_path / "2024-01-02.chain")
+    write_columnar(path, "2024-01-02", pyramid.pop(60000), resolution=60000, levels=pyramid)
+
+    assert ColumnarDayChain(path, "2024-01-02").read('C1')['time'].tolist() == [93000000, 93450000]
+    fine = ColumnarDayChain(path, "2024-01-02", 500000).read('C1')
+    assert fine['time'].tolist() == [93000000, 93505000]
+    assert fine['mid'].tolist() == [1.0, 3.0]
+
+def test_level_with_same_ticks_shares_columns(tmp_path):
+    times = np.array([0, 100000, 200000], dtype=np.int32)
+    mids = np.array([1.0, np.nan, 3.0], dtype=np.float32)
+    path = str(tmp_path / "2024-01-02.chain")
+    write_columnar(path, "2024-01-02", {'C1': (times, mids)}, resolution=60000, levels={5000: {'C1': (times, mids)}})
+
+    chain = ColumnarDayChain(path, "2024-01-02", 5000)
+    assert chain.index['C1'] == [0, 3]
+    assert chain.read('C1')['time'].tolist() == times.tolist()